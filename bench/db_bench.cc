@@ -9,18 +9,28 @@
 // SPDX-License-Identifier: Apache-2.0
 /* Copyright 2017-2021, Intel Corporation */
 
+#include <algorithm>
+#include <atomic>
 #include <chrono>
+#include <cmath>
 #include <cstdio>
 #include <cstdlib>
 #include <ctime>
+#include <deque>
 #include <inttypes.h>
 #include <iomanip>
 #include <iostream>
 #include <memory>
+#include <numeric>
+#include <signal.h>
 #include <sstream>
 #include <string>
 #include <sys/stat.h>
+#include <sys/sysmacros.h>
 #include <sys/types.h>
+#include <sys/wait.h>
+#include <thread>
+#include <unistd.h>
 #include <vector>
 
 #include "csv.h"
@@ -46,6 +56,9 @@ static const std::string USAGE =
 	"--threads=<integer>        (number of concurrent threads, default: 1)\n"
 	"--key_size=<integer>       (size of keys in bytes, default: 8)\n"
 	"--value_size=<integer>     (size of values in bytes, default: 100)\n"
+	"--value_size_distribution=<spec> (sizes of written values: fixed (value_size), uniform:<min>:<max>, "
+	"normal:<mean>:<stddev>, pareto:<scale>:<shape> or file:<path> - empirical histogram, with lines "
+	"'<size> <weight>'; sizes are limited to [1, max(1 MiB, value_size)], default: fixed)\n"
 	"--readwritepercent=<integer> (Ratio of reads to reads/writes (expressed "
 	"as percentage) for the ReadRandomWriteRandom workload. The default value "
 	"90 means 90% operations out of all reads and writes operations are reads. "
@@ -57,6 +70,31 @@ static const std::string USAGE =
 	"number of ops is `threads` * `num`. 1 means that each thread performs reads/writes using "
 	"only [`thread_id` * `num` / `threads`, (`thread_id` + 1) * `num` / `threads`) subset of keys, "
 	"so that total number of ops is `num`. The default value is 0.)\n"
+	"--duration=<integer>       (time limit of each benchmark in seconds, including warmup; when set, "
+	"benchmarks run for given time instead of given number of operations, sequential keys "
+	"wrap around, default: 0 - disabled)\n"
+	"--warmup_ops=<integer>     (number of unmeasured operations done by each thread at the beginning "
+	"of each benchmark; warmup operations are part of the benchmark's number of operations (e.g. num "
+	"or reads), so fewer operations are measured, default: 0)\n"
+	"--warmup_seconds=<integer> (time of unmeasured operations done by each thread at the beginning "
+	"of each benchmark, default: 0)\n"
+	"--steady_state=<integer>   (after warmup, continue unmeasured operations until throughput is stable: "
+	"it differs less than given percent between 100 ms intervals in 1 s window; 0 disables "
+	"detection, default: 0)\n"
+	"--steady_state_timeout=<integer> (maximum time in seconds spent waiting for the steady state, "
+	"default: 10)\n"
+	"--report_interval_ms=<integer> (report throughput and latency percentiles of each interval of given "
+	"length in milliseconds; 0 disables interval reporting, default: 0)\n"
+	"--report_file=<path>       (CSV file for interval reports, default: stderr)\n"
+	"--latency_sampling=<integer> (measure latency of every N-th operation only, using nanosecond "
+	"clock; other operations are only counted. 0 measures time between all operations (in microseconds), "
+	"default: 0)\n"
+	"--latency_sampling_random=<0|1> (sample operations randomly, with 1/N probability, instead of "
+	"every N-th one, default: 0)\n"
+	"--per_thread=<0|1>         (report ops, throughput, elapsed time and latencies of each thread, "
+	"along with imbalance between threads, default: 0)\n"
+	"--histogram_file=<path>    (write full latency histograms of all benchmarks to given file, as JSON "
+	"lines; they may be merged exactly, e.g. across runs, using run_benchmark.py)\n"
 	"--benchmarks=<name>,       (comma-separated list of benchmarks to run)\n"
 	"    fillseq                (load N values in sequential key order)\n"
 	"    fillrandom             (load N values in random key order)\n"
@@ -67,7 +105,31 @@ static const std::string USAGE =
 	"    deleterandom           (delete N values in random key order)\n"
 	"    readwhilewriting       (1 writer, N threads doing random reads)\n"
 	"    readrandomwriterandom  (N threads doing random-read, random-write)\n"
-	"    txfillrandom           (load N values in random key order transactionally)\n";
+	"    seekrandom             (find the first element above N random keys, sorted engines only)\n"
+	"    scanrandom             (read scan_length elements above N random keys, sorted engines only)\n"
+	"    countrange             (count elements in N random ranges of at least scan_length keys, "
+	"sorted engines only)\n"
+	"    ycsba                  (YCSB workload A: 50% reads, 50% updates, zipfian requests)\n"
+	"    ycsbb                  (YCSB workload B: 95% reads, 5% updates, zipfian requests)\n"
+	"    ycsbc                  (YCSB workload C: 100% reads, zipfian requests)\n"
+	"    ycsbd                  (YCSB workload D: 95% reads, 5% inserts, latest keys requested)\n"
+	"    ycsbe                  (YCSB workload E: 95% scans, 5% inserts, zipfian requests, "
+	"sorted engines only)\n"
+	"    ycsbf                  (YCSB workload F: 50% reads, 50% read-modify-writes, zipfian requests)\n"
+	"    txfillrandom           (load N values in random key order transactionally)\n"
+	"    poolcreate             (create a new pool, which must not exist)\n"
+	"    poolopen               (close and reopen the pool, e.g. populated by previous benchmarks)\n"
+	"    poolrecover            (open the pool after a writer process was killed in the middle of writes)\n"
+	"--key_distribution=<name>  (distribution of keys in random benchmarks: uniform, zipfian (scrambled "
+	"over the key space, as in YCSB), hotspot (hot_ops_fraction of operations use hot_fraction of keys) "
+	"or latest (zipfian, with the highest keys being the most popular), default: uniform)\n"
+	"--zipfian_theta=<double>   (skew of zipfian and latest distributions, 0 < theta < 1, default: 0.99)\n"
+	"--hot_fraction=<double>    (fraction of keys, which are hot in hotspot distribution, default: 0.2)\n"
+	"--hot_ops_fraction=<double> (fraction of operations using hot keys in hotspot distribution, "
+	"default: 0.8)\n"
+	"--scan_length=<integer>    (number of elements read by each scan of scanrandom; in ycsbe lengths "
+	"are uniformly distributed in [1, scan_length], default: 100)\n"
+	"--kill_after_ms=<integer>  (time of writes before the writer is killed in poolrecover, default: 1000)\n";
 
 /* Number of key/values to place in database */
 static int FLAGS_num = 1000000;
@@ -85,29 +147,88 @@ static int FLAGS_key_size = 8;
 /* Size of each value */
 static int FLAGS_value_size = 100;
 
+/* Distribution of sizes of written values */
+static const char *FLAGS_value_size_distribution = "fixed";
+
 /* Print histogram of operation timings */
 static bool FLAGS_histogram = false;
 
+/* Measure latency of every N-th operation only, 0 measures all of them */
+static int FLAGS_latency_sampling = 0;
+
+/* Sample operations with 1/N probability, instead of every N-th one */
+static bool FLAGS_latency_sampling_random = false;
+
+/* Report stats of each thread separately (besides the merged ones) */
+static bool FLAGS_per_thread = false;
+
 /* Use the db with the following name. */
 static const char *FLAGS_db = "/dev/shm/pmemkv_test_db";
 
 /* Use following size when opening the database. */
 static int FLAGS_db_size_in_gb = 0;
 
+/* Distribution of keys in random benchmarks */
+static const char *FLAGS_key_distribution = "uniform";
+
+/* Skew of zipfian and latest key distributions */
+static double FLAGS_zipfian_theta = 0.99;
+
+/* Fraction of hot keys and of operations using them, in hotspot key distribution */
+static double FLAGS_hot_fraction = 0.2;
+static double FLAGS_hot_ops_fraction = 0.8;
+
+/* Number of elements read by a scan (maximum one in YCSB workload E) */
+static int FLAGS_scan_length = 100;
+
+/* Time of writes before the writer process is killed in poolrecover */
+static int FLAGS_kill_after_ms = 1000;
+
 static const double FLAGS_compression_ratio = 1.0;
 
 static const int FLAGS_ops_between_duration_checks = 1000;
 
-static const int FLAGS_duration = 0;
+/* Time limit of each benchmark in seconds, 0 means it's bounded by number of operations */
+static int FLAGS_duration = 0;
 
 static int FLAGS_readwritepercent = 90;
 
 static int FLAGS_tx_size = 10;
 
+/* Number of unmeasured operations at the beginning of each benchmark (per thread) */
+static int FLAGS_warmup_ops = 0;
+
+/* Time of unmeasured operations at the beginning of each benchmark (per thread) */
+static int FLAGS_warmup_seconds = 0;
+
+/* Allowed throughput variation (in percent) in steady state, 0 disables detection */
+static int FLAGS_steady_state = 0;
+
+/* Maximum time of waiting for the steady state */
+static int FLAGS_steady_state_timeout = 10;
+
+/* Length of interval reports, 0 disables interval reporting */
+static int FLAGS_report_interval_ms = 0;
+
+/* Interval reports are written to this file (stderr if NULL) */
+static const char *FLAGS_report_file = NULL;
+
+static FILE *g_report_file = NULL;
+
+/* Full latency histograms are written to this file (as JSON lines), if set */
+static const char *FLAGS_histogram_file = NULL;
+
 using namespace leveldb;
 
 leveldb::Env *g_env = NULL;
 
+static inline uint64_t NowNanos()
+{
+	struct timespec ts;
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	return static_cast<uint64_t>(ts.tv_sec) * 1000000000 + ts.tv_nsec;
+}
+
 #if defined(__linux)
 
 static Slice TrimSpace(Slice s)
@@ -125,6 +246,269 @@ static Slice TrimSpace(Slice s)
 
 #endif
 
+/* Returns size of the pool file or device DAX in bytes, 0 if it's unknown (e.g. for poolsets) */
+static uint64_t PoolSize(const char *path)
+{
+	struct stat st;
+	if (stat(path, &st) != 0)
+		return 0;
+
+	if (S_ISCHR(st.st_mode)) {
+		char size_path[100];
+		snprintf(size_path, sizeof(size_path), "/sys/dev/char/%u:%u/size", major(st.st_rdev),
+			 minor(st.st_rdev));
+		FILE *size_file = fopen(size_path, "r");
+		if (size_file == NULL)
+			return 0;
+		uint64_t size = 0;
+		if (fscanf(size_file, "%" SCNu64, &size) != 1)
+			size = 0;
+		fclose(size_file);
+		return size;
+	}
+
+	char signature[11] = {};
+	FILE *pool_file = fopen(path, "r");
+	if (pool_file == NULL)
+		return 0;
+	size_t read = fread(signature, 1, sizeof(signature), pool_file);
+	fclose(pool_file);
+	if (read == sizeof(signature) && memcmp(signature, "PMEMPOOLSET", sizeof(signature)) == 0)
+		return 0;
+	return st.st_size;
+}
+
+/* Generates keys (their numbers) of random benchmarks in O(1) per draw, according to
+ * FLAGS_key_distribution. Zipfian generator (Gray et al., "Quickly Generating Billion-Record
+ * Synthetic Databases") is prepared for FLAGS_num items, smaller ranges of keys are folded onto it. */
+class KeyGenerator {
+private:
+	enum Distribution { kUniform, kZipfian, kHotspot, kLatest };
+	Distribution distribution_;
+	uint64_t items_;
+	double theta_;
+	double alpha_;
+	double zetan_;
+	double eta_;
+
+	/* Returns sum of 1/i^theta for i in [1, n]. Above 10^6 items, it's approximated
+	 * with Euler-Maclaurin formula, which is accurate and doesn't take long for large n */
+	static double Zeta(uint64_t n, double theta)
+	{
+		const uint64_t exact = std::min<uint64_t>(n, 1000000);
+		double sum = 0;
+		for (uint64_t i = 1; i <= exact; i++)
+			sum += std::pow(i, -theta);
+		if (n == exact)
+			return sum;
+
+		double m = exact, x = n;
+		sum += (std::pow(x, 1 - theta) - std::pow(m, 1 - theta)) / (1 - theta);
+		sum += (std::pow(x, -theta) - std::pow(m, -theta)) / 2;
+		sum += theta * (std::pow(m, -theta - 1) - std::pow(x, -theta - 1)) / 12;
+		return sum;
+	}
+
+	static uint64_t Hash(uint64_t value)
+	{
+		/* FNV-1a */
+		uint64_t hash = 0xcbf29ce484222325ULL;
+		for (int i = 0; i < 8; i++) {
+			hash ^= value & 0xff;
+			hash *= 0x100000001b3ULL;
+			value >>= 8;
+		}
+		return hash;
+	}
+
+	static double NextDouble(Random &rand)
+	{
+		return rand.Next() / 2147483647.0;
+	}
+
+	/* Returns rank of the item in [0, items_), the lower the more popular */
+	uint64_t NextZipfian(Random &rand)
+	{
+		double u = NextDouble(rand);
+		double uz = u * zetan_;
+		if (uz < 1.0)
+			return 0;
+		if (uz < 1.0 + std::pow(0.5, theta_))
+			return 1;
+		uint64_t rank = items_ * std::pow(eta_ * u - eta_ + 1, alpha_);
+		return std::min(rank, items_ - 1);
+	}
+
+public:
+	KeyGenerator(const char *distribution, uint64_t items, double theta)
+	    : items_(std::max<uint64_t>(items, 2)), theta_(theta)
+	{
+		if (strcmp(distribution, "uniform") == 0) {
+			distribution_ = kUniform;
+		} else if (strcmp(distribution, "zipfian") == 0) {
+			distribution_ = kZipfian;
+		} else if (strcmp(distribution, "hotspot") == 0) {
+			distribution_ = kHotspot;
+		} else if (strcmp(distribution, "latest") == 0) {
+			distribution_ = kLatest;
+		} else {
+			throw std::runtime_error("unknown key distribution: " + std::string(distribution));
+		}
+
+		if (distribution_ == kZipfian || distribution_ == kLatest) {
+			if (theta <= 0 || theta >= 1)
+				throw std::runtime_error("zipfian theta has to be in (0, 1)");
+			alpha_ = 1.0 / (1.0 - theta);
+			zetan_ = Zeta(items_, theta);
+			eta_ = (1 - std::pow(2.0 / items_, 1 - theta)) / (1 - Zeta(2, theta) / zetan_);
+		}
+	}
+
+	/* Returns key number in [0, range) */
+	uint64_t Next(Random &rand, uint64_t range)
+	{
+		switch (distribution_) {
+			case kZipfian:
+				return Hash(NextZipfian(rand)) % range;
+			case kHotspot: {
+				uint64_t hot = std::max<uint64_t>(range * FLAGS_hot_fraction, 1);
+				if (hot >= range)
+					return rand.Next() % range;
+				if (NextDouble(rand) < FLAGS_hot_ops_fraction)
+					return rand.Next() % hot;
+				return hot + rand.Next() % (range - hot);
+			}
+			case kLatest:
+				return range - 1 - NextZipfian(rand) % range;
+			default:
+				return rand.Next() % range;
+		}
+	}
+
+	bool IsUniform() const
+	{
+		return distribution_ == kUniform;
+	}
+};
+
+/* Generates sizes of written values according to FLAGS_value_size_distribution,
+ * fixed size (FLAGS_value_size) doesn't use the random generator at all */
+class ValueSizeGenerator {
+private:
+	enum Distribution { kFixed, kUniform, kNormal, kPareto, kEmpirical };
+	Distribution distribution_;
+	double a_;
+	double b_;
+	int max_;
+	double mean_;
+	/* sizes and cumulative weights of empirical distribution */
+	std::vector<int> sizes_;
+	std::vector<double> weights_;
+
+	static double NextDouble(Random &rand)
+	{
+		return rand.Next() / 2147483647.0;
+	}
+
+	void LoadHistogram(const char *path)
+	{
+		FILE *file = fopen(path, "r");
+		if (file == NULL)
+			throw std::runtime_error("cannot open value sizes histogram '" + std::string(path) +
+						 "'");
+		char line[1000];
+		double total = 0;
+		while (fgets(line, sizeof(line), file) != NULL) {
+			int size;
+			double weight;
+			if (line[0] == '#' || sscanf(line, "%d%*[ ,\t]%lf", &size, &weight) != 2)
+				continue;
+			if (size < 1 || weight < 0) {
+				fclose(file);
+				throw std::runtime_error("invalid entry in value sizes histogram: " +
+							 std::string(line));
+			}
+			total += weight;
+			sizes_.push_back(size);
+			weights_.push_back(total);
+		}
+		fclose(file);
+		if (total <= 0)
+			throw std::runtime_error("empty value sizes histogram '" + std::string(path) + "'");
+	}
+
+	int Generate(Random &rand)
+	{
+		double size;
+		switch (distribution_) {
+			case kUniform:
+				size = a_ + rand.Next() % static_cast<uint64_t>(b_ - a_ + 1);
+				break;
+			case kNormal: {
+				/* Box-Muller transform */
+				double u1 = std::max(NextDouble(rand), 1e-12);
+				double u2 = NextDouble(rand);
+				size = a_ + b_ * std::sqrt(-2 * std::log(u1)) * std::cos(2 * M_PI * u2);
+				break;
+			}
+			case kPareto:
+				size = a_ / std::pow(std::max(1 - NextDouble(rand), 1e-12), 1 / b_);
+				break;
+			case kEmpirical: {
+				double weight = NextDouble(rand) * weights_.back();
+				auto it = std::upper_bound(weights_.begin(), weights_.end(), weight);
+				size = sizes_[std::min<size_t>(it - weights_.begin(), sizes_.size() - 1)];
+				break;
+			}
+			default:
+				size = FLAGS_value_size;
+		}
+		return std::min<double>(std::max<double>(std::lround(size), 1), max_);
+	}
+
+public:
+	ValueSizeGenerator(const char *spec) : a_(0), b_(0), max_(std::max(1048576, FLAGS_value_size))
+	{
+		if (strcmp(spec, "fixed") == 0) {
+			distribution_ = kFixed;
+		} else if (sscanf(spec, "uniform:%lf:%lf", &a_, &b_) == 2 && a_ >= 1 && b_ >= a_) {
+			distribution_ = kUniform;
+		} else if (sscanf(spec, "normal:%lf:%lf", &a_, &b_) == 2 && b_ >= 0) {
+			distribution_ = kNormal;
+		} else if (sscanf(spec, "pareto:%lf:%lf", &a_, &b_) == 2 && a_ > 0 && b_ > 0) {
+			distribution_ = kPareto;
+		} else if (strncmp(spec, "file:", 5) == 0) {
+			distribution_ = kEmpirical;
+			LoadHistogram(spec + 5);
+		} else {
+			throw std::runtime_error("invalid value size distribution: " + std::string(spec));
+		}
+
+		/* Mean of limited sizes is estimated using a separate generator */
+		Random rand(301);
+		const int samples = distribution_ == kFixed ? 1 : 100000;
+		double sum = 0;
+		for (int i = 0; i < samples; i++)
+			sum += Generate(rand);
+		mean_ = sum / samples;
+	}
+
+	int Next(Random &rand)
+	{
+		return distribution_ == kFixed ? FLAGS_value_size : Generate(rand);
+	}
+
+	double Mean() const
+	{
+		return mean_;
+	}
+
+	bool IsFixed() const
+	{
+		return distribution_ == kFixed;
+	}
+};
+
 using kv_pointer = std::unique_ptr<pmem::kv::db, std::function<void(pmem::kv::db *)>>;
 
 /* Helper for quickly generating random data. */
@@ -188,23 +572,50 @@ enum OperationType : unsigned char {
 	kSeek,
 	kMerge,
 	kUpdate,
+	kInsert,
+	kScan,
+	kReadModifyWrite,
+	kCount,
+	kNumOperationTypes,
+};
+
+static const char *const kOperationTypeNames[kNumOperationTypes] = {
+	"Read", "Write", "Delete", "Seek", "Merge", "Update", "Insert", "Scan", "ReadModifyWrite", "Count"};
+
+/* Mix of operations (in percent) and distribution of requested keys of YCSB core workloads */
+struct YcsbWorkload {
+	int read;
+	int update;
+	int insert;
+	int scan;
+	int read_modify_write;
+	const char *distribution;
 };
 
+static const YcsbWorkload kYcsbA = {50, 50, 0, 0, 0, "zipfian"};
+static const YcsbWorkload kYcsbB = {95, 5, 0, 0, 0, "zipfian"};
+static const YcsbWorkload kYcsbC = {100, 0, 0, 0, 0, "zipfian"};
+static const YcsbWorkload kYcsbD = {95, 0, 5, 0, 0, "latest"};
+static const YcsbWorkload kYcsbE = {0, 0, 5, 95, 0, "zipfian"};
+static const YcsbWorkload kYcsbF = {50, 0, 0, 0, 50, "zipfian"};
+
 class BenchmarkLogger {
 private:
 	struct hist {
 		int id;
 		std::string name;
 		std::string histogram;
+		std::string json;
 	};
 	int id = 0;
+	int printed_id = 0;
 	std::vector<hist> histograms;
 	CSV<int> csv = CSV<int>("sequence_id");
 
 public:
 	void insert(std::string name, Histogram histogram)
 	{
-		histograms.push_back({id, name, histogram.ToString()});
+		histograms.push_back({id, name, histogram.ToString(), histogram.ToJSON()});
 		std::vector<double> percentiles = {50, 75, 90, 99.9, 99.99};
 		for (double &percentile : percentiles) {
 			csv.insert(id, "Percentile P" + std::to_string(percentile) + " [micros/op]",
@@ -235,15 +646,38 @@ public:
 		}
 	}
 
-	void print()
+	/* Prints results of the current benchmark, as soon as it's finished (each benchmark has
+	 * its own header, so results are available even if the process is killed later) */
+	void print_current()
 	{
-		csv.print();
+		if (id > printed_id) {
+			csv.print_row(id);
+			printed_id = id;
+		}
+	}
+
+	/* Writes histograms as JSON lines: {"sequence_id": ..., "Benchmark": ..., "histogram": {...}} */
+	bool write_histograms(const char *path)
+	{
+		FILE *file = fopen(path, "w");
+		if (file == NULL)
+			return false;
+		for (auto &histogram : histograms) {
+			fprintf(file, "{\"sequence_id\": %d, \"Benchmark\": \"%s\", \"histogram\": %s}\n",
+				histogram.id, histogram.name.c_str(), histogram.json.c_str());
+		}
+		return fclose(file) == 0;
 	}
 
 	void next_benchmark()
 	{
 		id++;
 	}
+
+	int get_id()
+	{
+		return id;
+	}
 };
 
 class Stats {
@@ -254,40 +688,176 @@ private:
 	int done_;
 	int next_report_;
 	int64_t bytes_;
+	/* Elements read by range queries */
+	int64_t items_;
 	double last_op_finish_;
+	/* Latencies of all operations, merged from op_hist_ when requested */
 	Histogram hist_;
 	std::string message_;
 	bool exclude_from_merge_;
 
-public:
-	Stats()
+	/* Throughput is measured in intervals of this length to detect the steady state */
+	static constexpr double kSteadyStateIntervalMicros = 100000;
+	static constexpr size_t kSteadyStateWindow = 10;
+
+	std::atomic<bool> warming_up_;
+	double warmup_start_;
+	double warmup_micros_;
+	int64_t warmup_ops_;
+	double interval_start_;
+	int64_t interval_done_;
+	std::deque<double> interval_rates_;
+
+	/* Stats of each type of operations, latencies of operations of threads excluded from
+	 * the merge are kept separately (they are reported only per operation type) */
+	Histogram op_hist_[kNumOperationTypes];
+	Histogram excluded_op_hist_[kNumOperationTypes];
+	int op_done_[kNumOperationTypes];
+
+	/* Operations finished since the last interval report. Latencies are added without locking
+	 * to the active one of two histograms, the reporter thread switches them at the end of each
+	 * interval and takes the inactive one, as soon as the owning thread stops writing to it */
+	Histogram report_hist_[2];
+	std::atomic<int> report_active_;
+	std::atomic<int> report_writing_;
+	/* Number of all operations (written only by the owning thread) and its value at the last report */
+	std::atomic<int64_t> report_done_;
+	int64_t report_taken_;
+
+	/* State of latency sampling: whether the current operation is sampled and its start */
+	bool sampled_;
+	uint64_t op_start_;
+	int until_sample_;
+	uint64_t sampling_rng_;
+
+	void AddToReport(double micros)
 	{
-		Start();
+		int active;
+		/* Announce the histogram before writing, retry if it was switched meanwhile */
+		do {
+			active = report_active_.load();
+			report_writing_.store(active);
+		} while (report_active_.load() != active);
+		report_hist_[active].Add(micros);
+		report_writing_.store(-1, std::memory_order_release);
 	}
 
-	void Start()
+	void CountForReport()
+	{
+		report_done_.store(report_done_.load(std::memory_order_relaxed) + 1,
+				   std::memory_order_relaxed);
+	}
+
+	/* Clears measurements, but not the warmup summary */
+	void Reset()
 	{
 		next_report_ = 100;
-		last_op_finish_ = start_;
 		hist_.Clear();
 		done_ = 0;
+		for (int op = 0; op < kNumOperationTypes; op++) {
+			op_hist_[op].Clear();
+			excluded_op_hist_[op].Clear();
+			op_done_[op] = 0;
+		}
 		bytes_ = 0;
+		items_ = 0;
 		seconds_ = 0;
 		start_ = g_env->NowMicros();
 		finish_ = start_;
+		last_op_finish_ = start_;
 		message_.clear();
+	}
+
+	/* Returns true when throughput of last intervals is stable */
+	bool SteadyState(double now)
+	{
+		interval_done_++;
+		if (now - interval_start_ < kSteadyStateIntervalMicros)
+			return false;
+
+		interval_rates_.push_back(interval_done_ / (now - interval_start_));
+		if (interval_rates_.size() > kSteadyStateWindow)
+			interval_rates_.pop_front();
+		interval_start_ = now;
+		interval_done_ = 0;
+		if (interval_rates_.size() < kSteadyStateWindow)
+			return false;
+
+		auto minmax = std::minmax_element(interval_rates_.begin(), interval_rates_.end());
+		double mean = std::accumulate(interval_rates_.begin(), interval_rates_.end(), 0.0) /
+			interval_rates_.size();
+		return (*minmax.second - *minmax.first) <= mean * FLAGS_steady_state / 100.0;
+	}
+
+	void FinishedWarmupOp(double now)
+	{
+		warmup_ops_++;
+		double elapsed = now - warmup_start_;
+		bool done = warmup_ops_ >= FLAGS_warmup_ops && elapsed >= FLAGS_warmup_seconds * 1e6;
+		if (FLAGS_steady_state > 0) {
+			bool steady = SteadyState(now);
+			bool timeout = elapsed >= (FLAGS_warmup_seconds + FLAGS_steady_state_timeout) * 1e6;
+			done = done && (steady || timeout);
+		}
+
+		if (done) {
+			warming_up_ = false;
+			warmup_micros_ = elapsed;
+			Reset();
+		}
+	}
+
+public:
+	Stats() : report_active_(0), report_writing_(-1), report_done_(0), report_taken_(0)
+	{
+		Start();
+	}
+
+	static bool WarmupEnabled()
+	{
+		return FLAGS_warmup_ops > 0 || FLAGS_warmup_seconds > 0 || FLAGS_steady_state > 0;
+	}
+
+	static bool ReportingEnabled()
+	{
+		return FLAGS_report_interval_ms > 0;
+	}
+
+	void Start()
+	{
+		Reset();
 		/* When set, stats from this thread won't be merged with others */
 		exclude_from_merge_ = false;
+
+		sampled_ = false;
+		until_sample_ = FLAGS_latency_sampling;
+		/* Seed differs between threads (and their Stats objects) */
+		sampling_rng_ = reinterpret_cast<uintptr_t>(this) | 1;
+
+		warming_up_ = WarmupEnabled();
+		warmup_start_ = start_;
+		warmup_micros_ = 0;
+		warmup_ops_ = 0;
+		interval_start_ = start_;
+		interval_done_ = 0;
+		interval_rates_.clear();
 	}
 
 	void Merge(const Stats &other)
 	{
+		for (int op = 0; op < kNumOperationTypes; op++) {
+			op_hist_[op].Merge(other.op_hist_[op]);
+			excluded_op_hist_[op].Merge(other.excluded_op_hist_[op]);
+			op_done_[op] += other.op_done_[op];
+		}
 		if (other.exclude_from_merge_)
 			return;
 
-		hist_.Merge(other.hist_);
+		warmup_micros_ = std::max(warmup_micros_, other.warmup_micros_);
+		warmup_ops_ += other.warmup_ops_;
 		done_ += other.done_;
 		bytes_ += other.bytes_;
+		items_ += other.items_;
 		seconds_ += other.seconds_;
 		if (other.start_ < start_)
 			start_ = other.start_;
@@ -303,6 +873,8 @@ public:
 	{
 		finish_ = g_env->NowMicros();
 		seconds_ = (finish_ - start_) * 1e-6;
+		if (warming_up_)
+			AddMessage("WARNING! FINISHED DURING WARMUP!");
 	}
 
 	void AddMessage(Slice msg)
@@ -315,13 +887,60 @@ public:
 		exclude_from_merge_ = true;
 	}
 
-	void FinishedSingleOp()
+	static bool SamplingEnabled()
+	{
+		return FLAGS_latency_sampling > 0;
+	}
+
+	/* Has to be called before each operation, when latency sampling is enabled */
+	void StartSingleOp()
+	{
+		if (!SamplingEnabled())
+			return;
+
+		if (FLAGS_latency_sampling_random) {
+			/* xorshift64 */
+			sampling_rng_ ^= sampling_rng_ << 13;
+			sampling_rng_ ^= sampling_rng_ >> 7;
+			sampling_rng_ ^= sampling_rng_ << 17;
+			sampled_ = sampling_rng_ % FLAGS_latency_sampling == 0;
+		} else {
+			sampled_ = --until_sample_ == 0;
+			if (sampled_)
+				until_sample_ = FLAGS_latency_sampling;
+		}
+		if (sampled_)
+			op_start_ = NowNanos();
+	}
+
+	void FinishedSingleOp(OperationType op)
 	{
+		if (SamplingEnabled()) {
+			FinishedSampledOp(op);
+			return;
+		}
+
 		double now = g_env->NowMicros();
 		double micros = now - last_op_finish_;
-		hist_.Add(micros);
 		last_op_finish_ = now;
+		if (ReportingEnabled()) {
+			AddToReport(micros);
+			CountForReport();
+		}
 
+		if (warming_up_) {
+			FinishedWarmupOp(now);
+			return;
+		}
+
+		op_done_[op]++;
+		/* Operations of threads excluded from the merge are reported only per operation type */
+		if (exclude_from_merge_) {
+			excluded_op_hist_[op].Add(micros);
+			return;
+		}
+
+		op_hist_[op].Add(micros);
 		done_++;
 		if (done_ >= next_report_) {
 			if (next_report_ < 1000)
@@ -341,11 +960,45 @@ public:
 		}
 	}
 
+	/* Counts the operation, its latency is recorded only if it was sampled */
+	void FinishedSampledOp(OperationType op)
+	{
+		double micros = 0;
+		if (sampled_)
+			micros = (NowNanos() - op_start_) * 1e-3;
+		if (ReportingEnabled()) {
+			if (sampled_)
+				AddToReport(micros);
+			CountForReport();
+		}
+
+		if (warming_up_) {
+			FinishedWarmupOp(g_env->NowMicros());
+			return;
+		}
+
+		op_done_[op]++;
+		if (exclude_from_merge_) {
+			if (sampled_)
+				excluded_op_hist_[op].Add(micros);
+			return;
+		}
+
+		if (sampled_)
+			op_hist_[op].Add(micros);
+		done_++;
+	}
+
 	void AddBytes(int64_t n)
 	{
 		bytes_ += n;
 	}
 
+	void AddItems(int64_t n)
+	{
+		items_ += n;
+	}
+
 	float get_micros_per_op()
 	{
 		/* Pretend at least one op was done in case we are running a benchmark
@@ -374,15 +1027,101 @@ public:
 		return (bytes_ / 1048576.0) / elapsed;
 	}
 
+	int64_t get_items()
+	{
+		return items_;
+	}
+
+	double get_items_per_sec()
+	{
+		return items_ / ((finish_ - start_) * 1e-6);
+	}
+
+	double get_bytes_per_sec()
+	{
+		return bytes_ / ((finish_ - start_) * 1e-6);
+	}
+
 	std::string get_extra_data()
 	{
 		return message_;
 	}
 
+	double get_warmup_millis()
+	{
+		return warmup_micros_ * 1e-3;
+	}
+
+	int64_t get_warmup_ops()
+	{
+		return warmup_ops_;
+	}
+
+	bool is_warming_up()
+	{
+		return warming_up_;
+	}
+
+	bool is_excluded_from_merge()
+	{
+		return exclude_from_merge_;
+	}
+
+	int get_done()
+	{
+		return done_;
+	}
+
+	int64_t get_bytes()
+	{
+		return bytes_;
+	}
+
+	double get_start()
+	{
+		return start_;
+	}
+
+	double get_finish()
+	{
+		return finish_;
+	}
+
+	/* Merges latencies of operations finished since the last call into hist, returns their number */
+	int64_t TakeReport(Histogram *hist)
+	{
+		int taken = report_active_.load();
+		report_active_.store(1 - taken);
+		while (report_writing_.load() == taken)
+			std::this_thread::yield();
+		hist->Merge(report_hist_[taken]);
+		report_hist_[taken].Clear();
+
+		int64_t done = report_done_.load(std::memory_order_relaxed);
+		int64_t taken_done = done - report_taken_;
+		report_taken_ = done;
+		return taken_done;
+	}
+
 	Histogram &get_histogram()
 	{
+		hist_.Clear();
+		for (int op = 0; op < kNumOperationTypes; op++)
+			hist_.Merge(op_hist_[op]);
 		return hist_;
 	}
+
+	Histogram get_histogram(OperationType op)
+	{
+		Histogram hist = op_hist_[op];
+		hist.Merge(excluded_op_hist_[op]);
+		return hist;
+	}
+
+	int get_done(OperationType op)
+	{
+		return op_done_[op];
+	}
 };
 
 /* State shared by all concurrent executions of the same benchmark. */
@@ -449,7 +1188,7 @@ public:
 			if ((ops_ / granularity) != ((ops_ - increment) / granularity)) {
 				time_point now = std::chrono::high_resolution_clock::now();
 				return std::chrono::duration_cast<std::chrono::milliseconds>(now - start_at_)
-					       .count() >= max_seconds_;
+					       .count() >= static_cast<int64_t>(max_seconds_ * 1000);
 			} else {
 				return false;
 			}
@@ -469,9 +1208,11 @@ private:
 class Benchmark {
 private:
 	pmem::kv::db *kv_;
+	kv_pointer &kv_ptr;
+	KeyGenerator key_gen;
+	ValueSizeGenerator value_sizes;
 	int num_;
 	int tx_size_;
-	int value_size_;
 	int key_size_;
 	int reads_;
 	int64_t readwrites_;
@@ -482,16 +1223,44 @@ private:
 
 	void (Benchmark::*method)(ThreadState *) = NULL;
 
+	/* Benchmarks of the pool itself (run in the main thread) */
+	void (Benchmark::*pool_method)() = NULL;
+
+	/* Benchmark is skipped, if the engine doesn't support range queries */
+	bool range_ = false;
+
+	const YcsbWorkload *ycsb_ = NULL;
+	std::unique_ptr<KeyGenerator> ycsb_keys_;
+	/* Number of keys in YCSB benchmarks, inserts use following ones. Keys are taken for inserts
+	 * from ycsb_inserting_, but become visible to other operations (through ycsb_inserted_) only
+	 * when all preceding keys are inserted */
+	std::atomic<int64_t> ycsb_inserting_;
+	std::atomic<int64_t> ycsb_inserted_;
+
 	void PrintHeader()
 	{
 		PrintEnvironment();
 		logger.insert("Path", FLAGS_db);
 		logger.insert("Engine", engine);
 		logger.insert("Keys [bytes each]", FLAGS_key_size);
-		logger.insert("Values [bytes each]", FLAGS_value_size);
+		if (value_sizes.IsFixed())
+			logger.insert("Values [bytes each]", FLAGS_value_size);
 		logger.insert("Entries", num_);
+		if (!key_gen.IsUniform()) {
+			std::string distribution = FLAGS_key_distribution;
+			if (distribution == "hotspot")
+				distribution += " (" + std::to_string(FLAGS_hot_ops_fraction) +
+					" of ops use " + std::to_string(FLAGS_hot_fraction) + " of keys)";
+			else
+				distribution += " (theta " + std::to_string(FLAGS_zipfian_theta) + ")";
+			logger.insert("Key distribution", distribution);
+		}
+		if (!value_sizes.IsFixed()) {
+			logger.insert("Value size distribution", FLAGS_value_size_distribution);
+			logger.insert("Values [bytes mean]", value_sizes.Mean());
+		}
 		logger.insert("RawSize [MB (estimated)]",
-			      ((static_cast<int64_t>(FLAGS_key_size + FLAGS_value_size) * num_) / 1048576.0));
+			      ((FLAGS_key_size + value_sizes.Mean()) * num_) / 1048576.0);
 		PrintWarnings();
 	}
 
@@ -541,7 +1310,8 @@ private:
 
 public:
 	Benchmark(Slice name, kv_pointer &kv, int num_threads, const char *engine, BenchmarkLogger &logger)
-	    : kv_(kv.get()), num_(FLAGS_num), tx_size_(FLAGS_tx_size), value_size_(FLAGS_value_size),
+	    : kv_(kv.get()), kv_ptr(kv), key_gen(FLAGS_key_distribution, FLAGS_num, FLAGS_zipfian_theta),
+	      value_sizes(FLAGS_value_size_distribution), num_(FLAGS_num), tx_size_(FLAGS_tx_size),
 	      key_size_(FLAGS_key_size), reads_(FLAGS_reads < 0 ? FLAGS_num : FLAGS_reads),
 	      readwrites_(FLAGS_reads < 0 ? FLAGS_num : FLAGS_reads), logger(logger), n(num_threads),
 	      name(name), engine(engine)
@@ -569,6 +1339,31 @@ public:
 			method = &Benchmark::ReadWhileWriting;
 		} else if (name == Slice("readrandomwriterandom")) {
 			method = &Benchmark::ReadRandomWriteRandom;
+		} else if (name.starts_with("ycsb") && name.size() == 5 && name[4] >= 'a' && name[4] <= 'f') {
+			static const YcsbWorkload *workloads[] = {&kYcsbA, &kYcsbB, &kYcsbC,
+								  &kYcsbD, &kYcsbE, &kYcsbF};
+			ycsb_ = workloads[name[4] - 'a'];
+			ycsb_keys_.reset(
+				new KeyGenerator(ycsb_->distribution, FLAGS_num, FLAGS_zipfian_theta));
+			ycsb_inserting_ = FLAGS_num;
+			ycsb_inserted_ = FLAGS_num;
+			range_ = ycsb_->scan > 0;
+			method = &Benchmark::Ycsb;
+		} else if (name == Slice("seekrandom")) {
+			range_ = true;
+			method = &Benchmark::SeekRandom;
+		} else if (name == Slice("scanrandom")) {
+			range_ = true;
+			method = &Benchmark::ScanRandom;
+		} else if (name == Slice("countrange")) {
+			range_ = true;
+			method = &Benchmark::CountRange;
+		} else if (name == Slice("poolcreate")) {
+			pool_method = &Benchmark::PoolCreate;
+		} else if (name == Slice("poolopen")) {
+			pool_method = &Benchmark::PoolOpen;
+		} else if (name == Slice("poolrecover")) {
+			pool_method = &Benchmark::PoolRecover;
 		} else {
 			throw std::runtime_error("unknown benchmark: " + name.ToString());
 		}
@@ -576,7 +1371,7 @@ public:
 		logger.insert("Benchmark", name.ToString());
 		PrintHeader();
 
-		if (!kv_) {
+		if (!kv_ && !pool_method) {
 			Create();
 			kv.reset(kv_);
 		}
@@ -611,6 +1406,18 @@ public:
 
 	void Run()
 	{
+		if (pool_method) {
+			(this->*pool_method)();
+			return;
+		}
+		if (range_ && !RangeSupported()) {
+			fprintf(stderr, "Skipping %s: engine '%s' doesn't support range queries\n",
+				name.ToString().c_str(), engine);
+			logger.insert("extra_data",
+				      std::string("skipped: engine doesn't support range queries"));
+			return;
+		}
+
 		SharedState shared;
 		shared.total = n;
 		shared.num_initialized = 0;
@@ -634,20 +1441,49 @@ public:
 
 		shared.start = true;
 		shared.cv.SignalAll();
+		std::atomic<bool> finished(false);
+		std::thread reporter;
+		if (Stats::ReportingEnabled()) {
+			reporter = std::thread(&Benchmark::Report, this, arg, &finished);
+		}
 		while (shared.num_done < n) {
 			shared.cv.Wait();
 		}
 		shared.mu.Unlock();
+		if (reporter.joinable()) {
+			finished = true;
+			reporter.join();
+		}
 
+		if (FLAGS_per_thread) {
+			PrintPerThread(arg);
+		}
 		for (int i = 1; i < n; i++) {
 			arg[0].thread->stats.Merge(arg[i].thread->stats);
 		}
-		auto thread_stats = arg[0].thread->stats;
+		auto &thread_stats = arg[0].thread->stats;
 		logger.insert("micros/op (avarage)", thread_stats.get_micros_per_op());
 		logger.insert("ops/sec", thread_stats.get_ops_per_sec());
 		logger.insert("throughput [MB/s]", thread_stats.get_throughput());
 		logger.insert("extra_data", thread_stats.get_extra_data());
+		if (range_) {
+			logger.insert("items/sec", thread_stats.get_items_per_sec());
+			logger.insert("bytes/sec", thread_stats.get_bytes_per_sec());
+		}
+		if (Stats::SamplingEnabled()) {
+			logger.insert("Latency sampling",
+				      std::string(FLAGS_latency_sampling_random ? "random " : "every ") +
+					      std::to_string(FLAGS_latency_sampling));
+			logger.insert(
+				"Latency samples",
+				std::to_string(static_cast<int64_t>(thread_stats.get_histogram().Count())));
+		}
+		if (Stats::WarmupEnabled()) {
+			logger.insert("Warmup [millis]", thread_stats.get_warmup_millis());
+			logger.insert("Warmup [ops]", std::to_string(thread_stats.get_warmup_ops()));
+		}
 		logger.insert(name.ToString(), thread_stats.get_histogram());
+		PrintPerOperation(thread_stats);
 		for (int i = 0; i < n; i++) {
 			delete arg[i].thread;
 		}
@@ -663,6 +1499,113 @@ private:
 		void (Benchmark::*method)(ThreadState *);
 	};
 
+	/* In benchmarks mixing different operations, inserts throughput and latencies of each type */
+	void PrintPerOperation(Stats &stats)
+	{
+		int types = 0;
+		for (int op = 0; op < kNumOperationTypes; op++)
+			types += stats.get_done(static_cast<OperationType>(op)) > 0;
+		if (types < 2)
+			return;
+
+		double elapsed = (stats.get_finish() - stats.get_start()) * 1e-6;
+		for (int op = 0; op < kNumOperationTypes; op++) {
+			auto type = static_cast<OperationType>(op);
+			int done = stats.get_done(type);
+			if (done == 0)
+				continue;
+
+			Histogram hist = stats.get_histogram(type);
+			std::string prefix = std::string(kOperationTypeNames[op]) + " ";
+			logger.insert(prefix + "ops", done);
+			logger.insert(prefix + "ops/sec", elapsed > 0 ? done / elapsed : 0);
+			logger.insert(prefix + "P50 [micros/op]", hist.Percentile(50));
+			logger.insert(prefix + "P99 [micros/op]", hist.Percentile(99));
+			logger.insert(prefix + "P99.9 [micros/op]", hist.Percentile(99.9));
+			logger.insert(prefix + "P99.99 [micros/op]", hist.Percentile(99.99));
+		}
+	}
+
+	/* Inserts stats of each thread (before they are merged) and imbalance between threads:
+	 * ratio of the lowest and the highest throughput, its coefficient of variation and
+	 * straggler time - between the first and the last thread finishing */
+	void PrintPerThread(ThreadArg *arg)
+	{
+		std::vector<double> rates;
+		double first_finish = 0;
+		double last_finish = 0;
+		for (int i = 0; i < n; i++) {
+			Stats &stats = arg[i].thread->stats;
+			if (stats.is_excluded_from_merge())
+				continue;
+
+			double elapsed = stats.get_finish() - stats.get_start();
+			double rate = elapsed > 0 ? stats.get_done() / (elapsed * 1e-6) : 0;
+			Histogram &hist = stats.get_histogram();
+			std::string prefix = "Thread " + std::to_string(i) + " ";
+			logger.insert(prefix + "ops", stats.get_done());
+			logger.insert(prefix + "ops/sec", rate);
+			logger.insert(prefix + "bytes", std::to_string(stats.get_bytes()));
+			logger.insert(prefix + "elapsed [millis]", elapsed * 1e-3);
+			logger.insert(prefix + "P50 [micros/op]", hist.Percentile(50));
+			logger.insert(prefix + "P99 [micros/op]", hist.Percentile(99));
+			logger.insert(prefix + "P99.9 [micros/op]", hist.Percentile(99.9));
+
+			if (rates.empty() || stats.get_finish() < first_finish)
+				first_finish = stats.get_finish();
+			if (rates.empty() || stats.get_finish() > last_finish)
+				last_finish = stats.get_finish();
+			rates.push_back(rate);
+		}
+		if (rates.empty())
+			return;
+
+		auto minmax = std::minmax_element(rates.begin(), rates.end());
+		double mean = std::accumulate(rates.begin(), rates.end(), 0.0) / rates.size();
+		double variance = 0;
+		for (double rate : rates)
+			variance += (rate - mean) * (rate - mean) / rates.size();
+		logger.insert("Threads ops/sec min/max",
+			      *minmax.second > 0 ? *minmax.first / *minmax.second : 0);
+		logger.insert("Threads ops/sec CV [%]", mean > 0 ? 100 * std::sqrt(variance) / mean : 0);
+		logger.insert("Straggler [millis]", (last_finish - first_finish) * 1e-3);
+	}
+
+	/* Body of the reporter thread: every FLAGS_report_interval_ms (and once more, when all
+	 * threads are finished) prints throughput and latencies of operations finished in the interval */
+	void Report(ThreadArg *arg, std::atomic<bool> *finished)
+	{
+		const double interval = FLAGS_report_interval_ms * 1e3;
+		const double start = g_env->NowMicros();
+		double last = start;
+		bool last_report = false;
+		Histogram hist;
+		while (!last_report) {
+			double now = g_env->NowMicros();
+			/* Sleep in short steps, not to delay the end of benchmark */
+			while (!(last_report = *finished) && now < last + interval) {
+				g_env->SleepForMicroseconds(std::min(last + interval - now, 10000.0));
+				now = g_env->NowMicros();
+			}
+
+			hist.Clear();
+			int64_t done = 0;
+			int warming_up = 0;
+			for (int i = 0; i < n; i++) {
+				done += arg[i].thread->stats.TakeReport(&hist);
+				warming_up += arg[i].thread->stats.is_warming_up();
+			}
+			fprintf(g_report_file,
+				"%d,%s,%.0f,%.3f,%.3f,%" PRId64 ",%.3f,%d,%.3f,%.3f,%.3f,%.3f\n",
+				logger.get_id(), name.ToString().c_str(), now * 1e-3, (now - start) * 1e-3,
+				(now - last) * 1e-3, done, done / ((now - last) * 1e-6), warming_up,
+				hist.Percentile(50), hist.Percentile(99), hist.Percentile(99.9),
+				hist.Percentile(99.99));
+			fflush(g_report_file);
+			last = now;
+		}
+	}
+
 	struct DbInserter {
 		DbInserter(pmem::kv::db *db) : db(db)
 		{
@@ -731,7 +1674,7 @@ private:
 	}
 
 	/* Throw exception for failed put (with proper message) */
-	void throw_put_error(int i, leveldb::Slice key, pmem::kv::status s)
+	void throw_put_error(int64_t i, leveldb::Slice key, pmem::kv::status s)
 	{
 		std::string prnt_key = key.ToString();
 		std::ostringstream err_msg;
@@ -752,6 +1695,13 @@ private:
 	}
 
 	void Create()
+	{
+		logger.insert("Open [millis/op]", Open());
+	}
+
+	/* Opens the pool, creating it if it's missing (or if error_if_exists is set, failing if it
+	 * exists), and returns time of it in milliseconds */
+	double Open(bool error_if_exists = false)
 	{
 		assert(kv_ == nullptr);
 		auto start = g_env->NowMicros();
@@ -762,9 +1712,16 @@ private:
 		if (cfg_s != pmem::kv::status::OK)
 			throw std::runtime_error("putting 'path' to config failed");
 
-		cfg_s = cfg.put_create_if_missing(true);
-		if (cfg_s != pmem::kv::status::OK)
-			throw std::runtime_error("putting 'create_if_missing' to config failed");
+		if (error_if_exists) {
+			cfg_s = cfg.put_create_or_error_if_exists(true);
+			if (cfg_s != pmem::kv::status::OK)
+				throw std::runtime_error(
+					"putting 'create_or_error_if_exists' to config failed");
+		} else {
+			cfg_s = cfg.put_create_if_missing(true);
+			if (cfg_s != pmem::kv::status::OK)
+				throw std::runtime_error("putting 'create_if_missing' to config failed");
+		}
 
 		cfg_s = cfg.put_uint64("size", size);
 		if (cfg_s != pmem::kv::status::OK)
@@ -779,7 +1736,99 @@ private:
 						 std::to_string(FLAGS_db_size_in_gb) +
 						 " GB capacity.\nError '" + pmem::kv::errormsg() + "'");
 		}
-		logger.insert("Open [millis/op]", ((g_env->NowMicros() - start) * 1e-3));
+		return (g_env->NowMicros() - start) * 1e-3;
+	}
+
+	/* Closes the pool (if it's open) and returns time of it in milliseconds */
+	double Close()
+	{
+		auto start = g_env->NowMicros();
+		kv_ptr.reset();
+		kv_ = nullptr;
+		return (g_env->NowMicros() - start) * 1e-3;
+	}
+
+	/* Inserts size and number of entries of the open pool */
+	void PrintPool()
+	{
+		auto size = PoolSize(FLAGS_db);
+		if (size > 0)
+			logger.insert("Pool size [GiB]", size / 1073741824.0);
+
+		std::size_t entries;
+		if (kv_->count_all(entries) == pmem::kv::status::OK)
+			logger.insert("Pool entries", std::to_string(entries));
+	}
+
+	void PoolCreate()
+	{
+		Close();
+		auto millis = Open(true);
+		kv_ptr.reset(kv_);
+		logger.insert("Create [millis]", millis);
+		PrintPool();
+	}
+
+	void PoolOpen()
+	{
+		if (kv_)
+			logger.insert("Close [millis]", Close());
+		auto millis = Open();
+		kv_ptr.reset(kv_);
+		logger.insert("Open [millis]", millis);
+		PrintPool();
+	}
+
+	/* Runs a writer in a child process and kills it after FLAGS_kill_after_ms,
+	 * so the pool has to be recovered when it's opened */
+	void PoolRecover()
+	{
+		Close();
+		int ready[2];
+		if (pipe(ready) != 0)
+			throw std::runtime_error("cannot create pipe");
+
+		pid_t writer = fork();
+		if (writer < 0)
+			throw std::runtime_error("cannot fork the writer process");
+		if (writer == 0) {
+			close(ready[0]);
+			try {
+				Open();
+			} catch (std::exception &e) {
+				std::cerr << e.what() << std::endl;
+				_exit(1);
+			}
+			if (write(ready[1], "", 1) != 1)
+				_exit(1);
+
+			std::unique_ptr<const char[]> key_guard;
+			Slice key = AllocateKey(key_guard);
+			Random rand(301);
+			RandomGenerator gen;
+			while (true) {
+				GenerateKeyFromInt(rand.Next() % num_, &key);
+				kv_->put(key.ToString(), gen.Generate(value_sizes.Next(rand)).ToString());
+			}
+		}
+
+		close(ready[1]);
+		char byte;
+		bool opened = read(ready[0], &byte, 1) == 1;
+		close(ready[0]);
+		if (opened)
+			g_env->SleepForMicroseconds(FLAGS_kill_after_ms * 1000);
+		kill(writer, SIGKILL);
+		int status;
+		waitpid(writer, &status, 0);
+		if (!opened)
+			throw std::runtime_error("writer process failed to open the pool");
+
+		auto millis = Open();
+		kv_ptr.reset(kv_);
+		logger.insert("Open [millis]", millis);
+		logger.insert("Writes before kill [millis]", FLAGS_kill_after_ms);
+		PrintPool();
 	}
 
 	template <typename Inserter = DbInserter>
@@ -798,31 +1847,36 @@ private:
 		auto end = FLAGS_disjoint ? (thread->tid + 1) * num : num_;
 
 		pmem::kv::status s;
-		int64_t bytes = 0;
 		auto batch_size = std::is_same<Inserter, TxInserter>::value ? tx_size_ : 1;
-		for (int n = start; n < end; n += batch_size) {
+		Duration duration(FLAGS_duration, (end - start + batch_size - 1) / batch_size * batch_size);
+		for (int64_t n = 0; !duration.Done(batch_size); n += batch_size) {
+			thread->stats.StartSingleOp();
 			Inserter inserter(kv_);
+			int64_t bytes = 0;
 
-			for (int i = n; i < n + batch_size; i++) {
-				const int k = seq ? i : (thread->rand.Next() % num) + start;
+			for (int64_t i = n; i < n + batch_size; i++) {
+				/* sequential keys wrap around, if time bound run exceeds the range */
+				const int k = (seq ? i % std::max(end - start, 1)
+						   : key_gen.Next(thread->rand, num)) +
+					start;
 				GenerateKeyFromInt(k, &key);
 				std::string value = std::string();
-				value.append(value_size_, 'X');
+				value.append(value_sizes.Next(thread->rand), 'X');
 				s = inserter.put(key.ToString(), value);
-				bytes += value_size_ + key.size();
+				bytes += value.size() + key.size();
 				if (s != pmem::kv::status::OK) {
 					throw_put_error(i, key, s);
 				}
 			}
 			s = inserter.commit();
-			thread->stats.FinishedSingleOp();
+			thread->stats.AddBytes(bytes);
+			thread->stats.FinishedSingleOp(kWrite);
 			if (s != pmem::kv::status::OK) {
 				throw std::runtime_error("Commit failed at batch " +
 							 std::to_string(n / batch_size) + "\nError '" +
 							 pmem::kv::errormsg() + "'");
 			}
 		}
-		thread->stats.AddBytes(bytes);
 	}
 
 	void WriteSeq(ThreadState *thread)
@@ -837,9 +1891,7 @@ private:
 
 	void DoRead(ThreadState *thread, bool seq, bool missing)
 	{
-		pmem::kv::status s;
-		int64_t bytes = 0;
-		int found = 0;
+		int64_t found = 0;
 		std::unique_ptr<const char[]> key_guard;
 		Slice key = AllocateKey(key_guard);
 
@@ -847,22 +1899,28 @@ private:
 		auto start = FLAGS_disjoint ? thread->tid * num : 0;
 		auto end = FLAGS_disjoint ? (thread->tid + 1) * num : reads_;
 
-		for (int i = start; i < end; i++) {
-			const int k = seq ? i : (thread->rand.Next() % num) + start;
+		Duration duration(FLAGS_duration, end - start);
+		int64_t i = 0;
+		for (; !duration.Done(1); i++) {
+			const int k = (seq ? i % std::max(end - start, 1) : key_gen.Next(thread->rand, num)) +
+				start;
 			GenerateKeyFromInt(k, &key, missing);
 			std::string value;
+			thread->stats.StartSingleOp();
 			if (kv_->get(key.ToString(), &value) == pmem::kv::status::OK)
 				found++;
-			thread->stats.FinishedSingleOp();
-			bytes += value.length() + key.size();
+			thread->stats.AddBytes(value.length() + key.size());
+			thread->stats.FinishedSingleOp(kRead);
 		}
-		thread->stats.AddBytes(bytes);
 		char msg[100];
+		const int64_t reads = FLAGS_duration ? i : reads_;
 		if (found)
-			snprintf(msg, sizeof(msg), "(%d of %d found by one thread)", found, reads_);
+			snprintf(msg, sizeof(msg), "(%" PRIi64 " of %" PRIi64 " found by one thread)", found,
+				 reads);
 		else
-			snprintf(msg, sizeof(msg), "(%d of %d found by one thread) WARNING! FOUND NOTHING!",
-				 found, reads_);
+			snprintf(msg, sizeof(msg),
+				 "(%" PRIi64 " of %" PRIi64 " found by one thread) WARNING! FOUND NOTHING!",
+				 found, reads);
 		thread->stats.AddMessage(msg);
 	}
 
@@ -885,11 +1943,13 @@ private:
 	{
 		std::unique_ptr<const char[]> key_guard;
 		Slice key = AllocateKey(key_guard);
-		for (int i = 0; i < num_; i++) {
-			const int k = seq ? i : (thread->rand.Next() % FLAGS_num);
+		Duration duration(FLAGS_duration, num_);
+		for (int64_t i = 0; !duration.Done(1); i++) {
+			const int k = seq ? i % std::max(num_, 1) : key_gen.Next(thread->rand, FLAGS_num);
 			GenerateKeyFromInt(k, &key);
+			thread->stats.StartSingleOp();
 			kv_->remove(key.ToString());
-			thread->stats.FinishedSingleOp();
+			thread->stats.FinishedSingleOp(kDelete);
 		}
 	}
 
@@ -907,9 +1967,8 @@ private:
 	{
 		/* Special thread that keeps writing until other threads are done. */
 		RandomGenerator gen;
-		int64_t bytes = 0;
 
-		/* Don't merge stats from this thread with the readers. */
+		/* Don't merge stats from this thread with the readers (except per-operation ones). */
 		thread->stats.SetExcludeFromMerge();
 
 		std::unique_ptr<const char[]> key_guard;
@@ -927,11 +1986,13 @@ private:
 				}
 			}
 
-			GenerateKeyFromInt(thread->rand.Next() % FLAGS_num, &key);
+			GenerateKeyFromInt(key_gen.Next(thread->rand, FLAGS_num), &key);
 			pmem::kv::status s;
 
+			const int value_size = value_sizes.Next(thread->rand);
 			if (write_merge == kWrite) {
-				s = kv_->put(key.ToString(), gen.Generate(value_size_).ToString());
+				thread->stats.StartSingleOp();
+				s = kv_->put(key.ToString(), gen.Generate(value_size).ToString());
 				if (s != pmem::kv::status::OK) {
 					throw_put_error(written, key, s);
 				}
@@ -939,9 +2000,9 @@ private:
 				throw std::runtime_error("Merge operation not supported");
 			}
 			written++;
-			bytes += key.size() + value_size_;
+			thread->stats.AddBytes(key.size() + value_size);
+			thread->stats.FinishedSingleOp(kWrite);
 		}
-		thread->stats.AddBytes(bytes);
 	}
 
 	void ReadWhileWriting(ThreadState *thread)
@@ -962,7 +2023,6 @@ private:
 		int put_weight = 0;
 		int64_t reads_done = 0;
 		int64_t writes_done = 0;
-		int64_t bytes = 0;
 		Duration duration(FLAGS_duration, readwrites_);
 
 		std::unique_ptr<const char[]> key_guard;
@@ -970,7 +2030,7 @@ private:
 
 		/* the number of iterations is the larger of read_ or write_ */
 		while (!duration.Done(1)) {
-			GenerateKeyFromInt(thread->rand.Next() % FLAGS_num, &key);
+			GenerateKeyFromInt(key_gen.Next(thread->rand, FLAGS_num), &key);
 			if (get_weight == 0 && put_weight == 0) {
 				/* one batch completed, reinitialize for next batch */
 				get_weight = FLAGS_readwritepercent;
@@ -978,6 +2038,7 @@ private:
 			}
 			if (get_weight > 0) {
 				value.clear();
+				thread->stats.StartSingleOp();
 				pmem::kv::status s = kv_->get(key.ToString(), &value);
 				if (s == pmem::kv::status::OK) {
 					found++;
@@ -986,25 +2047,26 @@ private:
 						key.ToString().c_str(), pmem::kv::errormsg().c_str());
 				}
 
-				bytes += value.length() + key.size();
+				thread->stats.AddBytes(value.length() + key.size());
 				get_weight--;
 				reads_done++;
-				thread->stats.FinishedSingleOp();
+				thread->stats.FinishedSingleOp(kRead);
 			} else if (put_weight > 0) {
 				/* then do all the corresponding number of puts
 				 * for all the gets we have done earlier */
+				const int value_size = value_sizes.Next(thread->rand);
+				thread->stats.StartSingleOp();
 				pmem::kv::status s =
-					kv_->put(key.ToString(), gen.Generate(value_size_).ToString());
+					kv_->put(key.ToString(), gen.Generate(value_size).ToString());
 				if (s != pmem::kv::status::OK) {
 					throw_put_error(writes_done, key, s);
 				}
-				bytes += key.size() + value_size_;
+				thread->stats.AddBytes(key.size() + value_size);
 				put_weight--;
 				writes_done++;
-				thread->stats.FinishedSingleOp();
+				thread->stats.FinishedSingleOp(kWrite);
 			}
 		}
-		thread->stats.AddBytes(bytes);
 		char msg[100];
 		snprintf(msg, sizeof(msg),
 			 "(reads:%" PRIu64 " writes:%" PRIu64 " total:%" PRIu64 " found:%" PRIu64 ")",
@@ -1016,6 +2078,170 @@ private:
 	{
 		DoWrite<TxInserter>(thread, false);
 	}
+
+	/* Checks if the engine supports range queries (sorted engines do) */
+	bool RangeSupported()
+	{
+		auto s = kv_->get_above("", [](pmem::kv::string_view, pmem::kv::string_view) { return 1; });
+		return s != pmem::kv::status::NOT_SUPPORTED;
+	}
+
+	/* Reads up to length elements following the key, adds their number and size to the stats */
+	void Scan(ThreadState *thread, const Slice &key, int length)
+	{
+		int64_t items = 0;
+		int64_t bytes = 0;
+		auto s =
+			kv_->get_above(key.ToString(), [&](pmem::kv::string_view k, pmem::kv::string_view v) {
+				items++;
+				bytes += k.size() + v.size();
+				return items < length ? 0 : 1;
+			});
+		if (s != pmem::kv::status::OK && s != pmem::kv::status::STOPPED_BY_CB)
+			throw std::runtime_error("Scan failed\nError '" + pmem::kv::errormsg() + "'");
+		thread->stats.AddItems(items);
+		thread->stats.AddBytes(bytes);
+	}
+
+	void SeekRandom(ThreadState *thread)
+	{
+		std::unique_ptr<const char[]> key_guard;
+		Slice key = AllocateKey(key_guard);
+		Duration duration(FLAGS_duration, reads_);
+		while (!duration.Done(1)) {
+			GenerateKeyFromInt(key_gen.Next(thread->rand, FLAGS_num), &key);
+			thread->stats.StartSingleOp();
+			Scan(thread, key, 1);
+			thread->stats.FinishedSingleOp(kSeek);
+		}
+	}
+
+	void ScanRandom(ThreadState *thread)
+	{
+		std::unique_ptr<const char[]> key_guard;
+		Slice key = AllocateKey(key_guard);
+		Duration duration(FLAGS_duration, reads_);
+		while (!duration.Done(1)) {
+			GenerateKeyFromInt(key_gen.Next(thread->rand, FLAGS_num), &key);
+			thread->stats.StartSingleOp();
+			Scan(thread, key, FLAGS_scan_length);
+			thread->stats.FinishedSingleOp(kScan);
+		}
+	}
+
+	/* Counts keys, which have the same prefix as a random key. Keys are little-endian numbers,
+	 * so the prefix length is chosen to have at least FLAGS_scan_length keys in each range
+	 * (on average, if keys are dense) */
+	void CountRange(ThreadState *thread)
+	{
+		std::unique_ptr<const char[]> key_guard;
+		Slice key = AllocateKey(key_guard);
+		int prefix = 0;
+		while (prefix < std::min(key_size_, 8) &&
+		       FLAGS_num / std::pow(256, prefix + 1) >= FLAGS_scan_length)
+			prefix++;
+
+		Duration duration(FLAGS_duration, reads_);
+		while (!duration.Done(1)) {
+			GenerateKeyFromInt(key_gen.Next(thread->rand, FLAGS_num), &key);
+			/* range is (prefix followed by zeros, next prefix) */
+			std::string begin = key.ToString().substr(0, prefix);
+			std::string end = begin;
+			begin.append(key_size_ - prefix, '\0');
+			int carry = prefix - 1;
+			while (carry >= 0 && static_cast<unsigned char>(end[carry]) == 0xff)
+				end.resize(carry--);
+			if (carry >= 0)
+				end[carry]++;
+
+			std::size_t count = 0;
+			thread->stats.StartSingleOp();
+			auto s = carry >= 0 ? kv_->count_between(begin, end, count)
+					    : kv_->count_above(begin, count);
+			if (s != pmem::kv::status::OK)
+				throw std::runtime_error("Count failed\nError '" + pmem::kv::errormsg() +
+							 "'");
+			thread->stats.AddItems(count);
+			thread->stats.FinishedSingleOp(kCount);
+		}
+	}
+
+	/* Runs mix of operations of the YCSB workload (data has to be loaded by previous benchmarks,
+	 * e.g. fillseq), each thread does FLAGS_reads operations */
+	void Ycsb(ThreadState *thread)
+	{
+		RandomGenerator gen;
+		std::string value;
+		int64_t found = 0;
+		int64_t reads = 0;
+		Duration duration(FLAGS_duration, readwrites_);
+
+		std::unique_ptr<const char[]> key_guard;
+		Slice key = AllocateKey(key_guard);
+
+		while (!duration.Done(1)) {
+			int operation = thread->rand.Next() % 100;
+			if (operation < ycsb_->insert) {
+				int64_t k = ycsb_inserting_++;
+				GenerateKeyFromInt(k, &key);
+				const int value_size = value_sizes.Next(thread->rand);
+				thread->stats.StartSingleOp();
+				auto s = kv_->put(key.ToString(), gen.Generate(value_size).ToString());
+				if (s != pmem::kv::status::OK)
+					throw_put_error(k, key, s);
+				/* Publish the key after all preceding ones, so reads never miss inserted keys
+				 */
+				int64_t expected = k;
+				while (!ycsb_inserted_.compare_exchange_weak(expected, k + 1)) {
+					expected = k;
+					std::this_thread::yield();
+				}
+				thread->stats.AddBytes(key.size() + value_size);
+				thread->stats.FinishedSingleOp(kInsert);
+				continue;
+			}
+			operation -= ycsb_->insert;
+			GenerateKeyFromInt(ycsb_keys_->Next(thread->rand, ycsb_inserted_), &key);
+
+			if (operation < ycsb_->scan) {
+				thread->stats.StartSingleOp();
+				Scan(thread, key, 1 + thread->rand.Next() % FLAGS_scan_length);
+				thread->stats.FinishedSingleOp(kScan);
+			} else if (operation < ycsb_->scan + ycsb_->update) {
+				const int value_size = value_sizes.Next(thread->rand);
+				thread->stats.StartSingleOp();
+				auto s = kv_->put(key.ToString(), gen.Generate(value_size).ToString());
+				if (s != pmem::kv::status::OK)
+					throw_put_error(reads, key, s);
+				thread->stats.AddBytes(key.size() + value_size);
+				thread->stats.FinishedSingleOp(kUpdate);
+			} else {
+				/* read, or read-modify-write */
+				bool modify = operation >= ycsb_->scan + ycsb_->update + ycsb_->read;
+				value.clear();
+				thread->stats.StartSingleOp();
+				auto s = kv_->get(key.ToString(), &value);
+				if (s == pmem::kv::status::OK)
+					found++;
+				reads++;
+				thread->stats.AddBytes(key.size() + value.length());
+				if (modify) {
+					const int value_size = value_sizes.Next(thread->rand);
+					s = kv_->put(key.ToString(), gen.Generate(value_size).ToString());
+					if (s != pmem::kv::status::OK)
+						throw_put_error(reads, key, s);
+					thread->stats.AddBytes(key.size() + value_size);
+				}
+				thread->stats.FinishedSingleOp(modify ? kReadModifyWrite : kRead);
+			}
+		}
+		if (reads > 0) {
+			char msg[100];
+			snprintf(msg, sizeof(msg), "(%" PRId64 " of %" PRId64 " found by one thread)", found,
+				 reads);
+			thread->stats.AddMessage(msg);
+		}
+	}
 };
 
 int main(int argc, char **argv)
@@ -1039,6 +2265,7 @@ int main(int argc, char **argv)
 	/* Parse command-line arguments */
 	for (int i = 1; i < argc; i++) {
 		int n;
+		double d;
 		char junk;
 		if (leveldb::Slice(argv[i]).starts_with("--benchmarks=")) {
 			FLAGS_benchmarks = argv[i] + strlen("--benchmarks=");
@@ -1046,6 +2273,13 @@ int main(int argc, char **argv)
 			FLAGS_engine = argv[i] + 9;
 		} else if (sscanf(argv[i], "--histogram=%d%c", &n, &junk) == 1 && (n == 0 || n == 1)) {
 			FLAGS_histogram = n;
+		} else if (sscanf(argv[i], "--latency_sampling=%d%c", &n, &junk) == 1 && n >= 0) {
+			FLAGS_latency_sampling = n;
+		} else if (sscanf(argv[i], "--latency_sampling_random=%d%c", &n, &junk) == 1 &&
+			   (n == 0 || n == 1)) {
+			FLAGS_latency_sampling_random = n;
+		} else if (sscanf(argv[i], "--per_thread=%d%c", &n, &junk) == 1 && (n == 0 || n == 1)) {
+			FLAGS_per_thread = n;
 		} else if (sscanf(argv[i], "--num=%d%c", &n, &junk) == 1) {
 			FLAGS_num = n;
 		} else if (sscanf(argv[i], "--reads=%d%c", &n, &junk) == 1) {
@@ -1062,10 +2296,40 @@ int main(int argc, char **argv)
 			FLAGS_db = argv[i] + 5;
 		} else if (sscanf(argv[i], "--db_size_in_gb=%d%c", &n, &junk) == 1) {
 			FLAGS_db_size_in_gb = n;
+		} else if (strncmp(argv[i], "--value_size_distribution=", 26) == 0) {
+			FLAGS_value_size_distribution = argv[i] + 26;
+		} else if (strncmp(argv[i], "--key_distribution=", 19) == 0) {
+			FLAGS_key_distribution = argv[i] + 19;
+		} else if (sscanf(argv[i], "--zipfian_theta=%lf%c", &d, &junk) == 1 && d > 0 && d < 1) {
+			FLAGS_zipfian_theta = d;
+		} else if (sscanf(argv[i], "--hot_fraction=%lf%c", &d, &junk) == 1 && d > 0 && d <= 1) {
+			FLAGS_hot_fraction = d;
+		} else if (sscanf(argv[i], "--hot_ops_fraction=%lf%c", &d, &junk) == 1 && d >= 0 && d <= 1) {
+			FLAGS_hot_ops_fraction = d;
+		} else if (sscanf(argv[i], "--scan_length=%d%c", &n, &junk) == 1 && n > 0) {
+			FLAGS_scan_length = n;
+		} else if (sscanf(argv[i], "--duration=%d%c", &n, &junk) == 1 && n >= 0) {
+			FLAGS_duration = n;
+		} else if (sscanf(argv[i], "--kill_after_ms=%d%c", &n, &junk) == 1 && n >= 0) {
+			FLAGS_kill_after_ms = n;
 		} else if (sscanf(argv[i], "--tx_size=%d%c", &n, &junk) == 1) {
 			FLAGS_tx_size = n;
 		} else if (sscanf(argv[i], "--disjoint=%d%c", &n, &junk) == 1 && (n == 0 || n == 1)) {
 			FLAGS_disjoint = n;
+		} else if (sscanf(argv[i], "--warmup_ops=%d%c", &n, &junk) == 1 && n >= 0) {
+			FLAGS_warmup_ops = n;
+		} else if (sscanf(argv[i], "--warmup_seconds=%d%c", &n, &junk) == 1 && n >= 0) {
+			FLAGS_warmup_seconds = n;
+		} else if (sscanf(argv[i], "--steady_state=%d%c", &n, &junk) == 1 && n >= 0) {
+			FLAGS_steady_state = n;
+		} else if (sscanf(argv[i], "--steady_state_timeout=%d%c", &n, &junk) == 1 && n >= 0) {
+			FLAGS_steady_state_timeout = n;
+		} else if (sscanf(argv[i], "--report_interval_ms=%d%c", &n, &junk) == 1 && n >= 0) {
+			FLAGS_report_interval_ms = n;
+		} else if (strncmp(argv[i], "--report_file=", 14) == 0) {
+			FLAGS_report_file = argv[i] + 14;
+		} else if (strncmp(argv[i], "--histogram_file=", 17) == 0) {
+			FLAGS_histogram_file = argv[i] + 17;
 		} else {
 			fprintf(stderr, "Invalid flag '%s'\n", argv[i]);
 			exit(1);
@@ -1075,6 +2339,18 @@ int main(int argc, char **argv)
 	/* Run benchmark against default environment */
 	g_env = leveldb::Env::Default();
 
+	if (FLAGS_report_interval_ms > 0) {
+		g_report_file = FLAGS_report_file ? fopen(FLAGS_report_file, "w") : stderr;
+		if (g_report_file == NULL) {
+			fprintf(stderr, "Cannot open report file '%s'\n", FLAGS_report_file);
+			exit(1);
+		}
+		fprintf(g_report_file,
+			"sequence_id,Benchmark,Timestamp [millis],Elapsed [millis],Interval [millis],Ops,ops/sec,"
+			"Warmup threads,Percentile P50 [micros/op],Percentile P99 [micros/op],"
+			"Percentile P99.9 [micros/op],Percentile P99.99 [micros/op]\n");
+	}
+
 	BenchmarkLogger logger = BenchmarkLogger();
 	int return_value = 0;
 	auto kv = kv_pointer(nullptr, [](pmem::kv::db *kv) {
@@ -1093,17 +2369,25 @@ int main(int argc, char **argv)
 			benchmarks = sep + 1;
 		}
 		try {
-			auto benchmark = Benchmark(name, kv, FLAGS_threads, FLAGS_engine, logger);
+			Benchmark benchmark(name, kv, FLAGS_threads, FLAGS_engine, logger);
 			benchmark.Run();
+			logger.print_current();
 		} catch (std::exception &e) {
+			logger.print_current();
 			std::cerr << e.what() << std::endl;
 			return_value = 1;
 			break;
 		}
 	}
-	logger.print();
 	if (FLAGS_histogram) {
 		logger.print_histogram();
 	}
+	if (FLAGS_histogram_file && !logger.write_histograms(FLAGS_histogram_file)) {
+		fprintf(stderr, "Cannot write histograms to '%s'\n", FLAGS_histogram_file);
+		return_value = 1;
+	}
+	if (g_report_file != NULL && g_report_file != stderr) {
+		fclose(g_report_file);
+	}
 	return return_value;
 }
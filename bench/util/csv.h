@@ -6,7 +6,6 @@
 #include <iostream>
 #include <map>
 #include <ostream>
-#include <set>
 #include <string>
 
 template <typename IdType>
@@ -15,17 +14,12 @@ private:
 	/* Hold data in two-dimensional map of strings: data_matrix[row][column]
 	 */
 	std::map<IdType, std::map<std::string, std::string>> data_matrix;
-	/* List of all columns, which is filled during inserts. Needed for
-	 * printing header and data in the same order.
-	 * */
-	std::set<std::string> columns;
 	std::string id_name;
 
 public:
 	CSV(std::string id_column_name) : id_name(id_column_name){};
 	void insert(IdType row, std::string column, std::string data)
 	{
-		columns.insert(column);
 		data_matrix[row][column] = data;
 	}
 
@@ -40,22 +34,20 @@ public:
 		insert(row, column, std::to_string(data));
 	}
 
-	void print()
+	/* Prints header with columns of the given row only, followed by the row */
+	void print_row(IdType row)
 	{
-		// Print first column name
+		auto &data = data_matrix[row];
 		std::cout << id_name;
-
-		for (auto &column : columns) {
-			std::cout << "," << column;
+		for (auto &column : data) {
+			std::cout << "," << column.first;
 		}
-		std::cout << "\r\n" << std::flush;
+		std::cout << "\r\n";
 
-		for (auto &row : data_matrix) {
-			std::cout << row.first;
-			for (auto &column : columns) {
-				std::cout << "," << data_matrix[row.first][column];
-			}
-			std::cout << "\r\n" << std::flush;
+		std::cout << row;
+		for (auto &column : data) {
+			std::cout << "," << column.second;
 		}
+		std::cout << "\r\n" << std::flush;
 	}
 };
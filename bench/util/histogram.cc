@@ -159,4 +159,27 @@ std::string Histogram::ToString() const
 	return r;
 }
 
+std::string Histogram::ToJSON() const
+{
+	std::string r;
+	char buf[200];
+	snprintf(buf, sizeof(buf), "{\"min\": %.17g, \"max\": %.17g, \"num\": %.17g, \"sum\": %.17g, ", min_,
+		 max_, num_, sum_);
+	r.append(buf);
+	snprintf(buf, sizeof(buf), "\"sum_squares\": %.17g, \"buckets\": [", sum_squares_);
+	r.append(buf);
+	// Only non-empty buckets are listed, as [left, right, count]
+	bool first = true;
+	for (int b = 0; b < kNumBuckets; b++) {
+		if (buckets_[b] <= 0.0)
+			continue;
+		snprintf(buf, sizeof(buf), "%s[%.17g, %.17g, %.17g]", first ? "" : ", ",
+			 ((b == 0) ? 0.0 : kBucketLimit[b - 1]), kBucketLimit[b], buckets_[b]);
+		r.append(buf);
+		first = false;
+	}
+	r.append("]}");
+	return r;
+}
+
 } // namespace leveldb
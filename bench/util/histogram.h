@@ -27,10 +27,15 @@ public:
 	void Merge(const Histogram &other);
 
 	std::string ToString() const;
+	std::string ToJSON() const;
 
 	double Median() const;
 	double Percentile(double p) const;
 	double Average() const;
+	double Count() const
+	{
+		return num_;
+	}
 	double StandardDeviation() const;
 
 private:
@@ -21,6 +21,8 @@ benchmarks = [
 key_size = [8]
 value_size = [8, 128, 256, 512, 1024]
 number_of_elements = int(10 * 1e6)
+# Distributions of keys in random benchmarks: uniform, zipfian, hotspot or latest
+key_distribution = ["uniform"]
 
 
 def concurrent_engines():
@@ -38,7 +40,7 @@ def generate():
     benchmarks = []
     benchmarks.extend(concurrent_engines())
     benchmarks_configuration = []
-    for benchmark in benchmarks:
+    for benchmark, distribution in itertools.product(benchmarks, key_distribution):
         benchmark_settings = {
             "env": {},
             "pmemkv_bench": {
@@ -54,6 +56,9 @@ def generate():
             },
             "emon": "True",
         }
+        # uniform distribution is the default one
+        if distribution != "uniform":
+            benchmark_settings["pmemkv_bench"]["--key_distribution"] = distribution
 
         benchmarks_configuration.append(benchmark_settings)
 
@@ -22,6 +22,8 @@ key_size = [8]
 value_size = [8, 128, 256, 512, 1024]
 number_of_elements = int(10 * 1e6)
 db_size = 500
+# Distributions of keys in random benchmarks: uniform, zipfian, hotspot or latest
+key_distribution = ["uniform"]
 
 
 def concurrent_engines():
@@ -65,7 +67,7 @@ def generate():
 
     benchmarks_configuration = []
     db_path = os.getenv("PMEMKV_BENCH_DB_PATH", "/mnt/pmem0/pmemkv-bench")
-    for benchmark in scenarios:
+    for benchmark, distribution in itertools.product(scenarios, key_distribution):
         benchmark_settings = {
             "env": {},
             "pmemkv_bench": {
@@ -83,6 +85,9 @@ def generate():
             },
             "emon": "True",
         }
+        # uniform distribution is the default one
+        if distribution != "uniform":
+            benchmark_settings["pmemkv_bench"]["--key_distribution"] = distribution
 
         benchmarks_configuration.append(benchmark_settings)
 
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021, Intel Corporation
+
+# This script implements generate() method, which may be invoked by run_benchmark.py directly
+# or used as standalone application, which prints configuration json to stdout.
+# Such once generated json may be saved and passed to run_benchmark.py as a parameter.
+
+import argparse
+import json
+import itertools
+import os
+
+# Pool is created, filled, then closed and opened again and at last opened after
+# unclean shutdown (writer process killed in the middle of writes)
+benchmarks = ["poolcreate,fillrandom,poolopen,poolrecover"]
+key_size = [8]
+value_size = [8, 1024]
+number_of_elements = [int(1e6), int(10 * 1e6), int(100 * 1e6)]
+db_size = [50, 100, 250, 500]
+engine = ["cmap", "csmap", "radix", "stree"]
+# Approximate overhead of each entry (allocator's headers and engine's index) in bytes
+entry_overhead = 64
+
+
+def generate():
+    scenarios = itertools.product(
+        benchmarks, key_size, value_size, number_of_elements, db_size, engine
+    )
+
+    benchmarks_configuration = []
+    db_path = os.getenv("PMEMKV_BENCH_DB_PATH", "/mnt/pmem0/pmemkv-bench")
+    for benchmark in scenarios:
+        # skip pools too small to hold the data
+        data_size = benchmark[3] * (benchmark[1] + benchmark[2] + entry_overhead)
+        if data_size > benchmark[4] * 1024 ** 3:
+            continue
+        benchmark_settings = {
+            "env": {},
+            "pmemkv_bench": {
+                "--benchmarks": f"{benchmark[0]}",
+                "--key_size": f"{benchmark[1]}",
+                "--value_size": f"{benchmark[2]}",
+                "--num": f"{benchmark[3]}",
+                "--db_size_in_gb": f"{benchmark[4]}",
+                "--engine": f"{benchmark[5]}",
+                "--threads": "1",
+                "--db": db_path,
+            },
+            "numactl": {
+                "--cpubind": f"file:{os.path.dirname(db_path)}",
+            },
+            # poolcreate requires non-existing pool
+            "cleanup": 1,
+        }
+
+        benchmarks_configuration.append(benchmark_settings)
+
+    return benchmarks_configuration
+
+
+if __name__ == "__main__":
+    help_msg = """
+Test case generator for benchmarks of creating, opening and recovering pools
+of libpmemobj-cpp based pmemkv engines, with various sizes and numbers of entries.
+
+note:
+Database path may be specified by `PMEMKV_BENCH_DB_PATH` environment variable
+(/mnt/pmem0/pmemkv-bench by default). It should be path to the pool file, which
+doesn't exist.
+"""
+    argparse.ArgumentParser(
+        description=help_msg, formatter_class=argparse.RawTextHelpFormatter
+    ).parse_args()
+
+    output = generate()
+    print(json.dumps(output, indent=4))
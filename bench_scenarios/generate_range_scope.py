@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021, Intel Corporation
+
+# This script implements generate() method, which may be invoked by run_benchmark.py directly
+# or used as standalone application, which prints configuration json to stdout.
+# Such once generated json may be saved and passed to run_benchmark.py as a parameter.
+
+import argparse
+import json
+import itertools
+import os
+
+# Data is loaded with fillseq, then range benchmarks are run on it
+benchmarks = ["fillseq,seekrandom,scanrandom,countrange"]
+key_size = [8]
+value_size = [8, 128, 256, 512, 1024]
+number_of_elements = int(10 * 1e6)
+# Number of range operations done by each thread
+number_of_reads = int(1e6)
+db_size = 500
+# Engines supporting range queries
+engine = ["csmap", "radix", "stree"]
+
+
+def generate():
+    scenarios = itertools.product(benchmarks, key_size, value_size, engine)
+
+    benchmarks_configuration = []
+    db_path = os.getenv("PMEMKV_BENCH_DB_PATH", "/mnt/pmem0/pmemkv-bench")
+    for benchmark in scenarios:
+        benchmark_settings = {
+            "env": {},
+            "pmemkv_bench": {
+                "--benchmarks": f"{benchmark[0]}",
+                "--key_size": f"{benchmark[1]}",
+                "--value_size": f"{benchmark[2]}",
+                "--engine": f"{benchmark[3]}",
+                "--threads": "1",
+                "--num": f"{number_of_elements}",
+                "--reads": f"{number_of_reads}",
+                "--db": db_path,
+                "--db_size_in_gb": f"{db_size}",
+            },
+            "numactl": {
+                "--cpubind": f"file:{os.path.dirname(db_path)}",
+            },
+            "emon": "False",
+            "cleanup": 1,
+        }
+
+        benchmarks_configuration.append(benchmark_settings)
+
+    return benchmarks_configuration
+
+
+if __name__ == "__main__":
+    help_msg = """
+Test case generator for range benchmarks (seekrandom, scanrandom and countrange)
+of sorted, libpmemobj-cpp based pmemkv engines.
+
+note:
+Database path may be specified by `PMEMKV_BENCH_DB_PATH` environment variable
+(/mnt/pmem0/pmemkv-bench by default). Please be aware that for libpmemobj-cpp
+based engines this should be path to the pool file.
+"""
+    argparse.ArgumentParser(
+        description=help_msg, formatter_class=argparse.RawTextHelpFormatter
+    ).parse_args()
+
+    output = generate()
+    print(json.dumps(output, indent=4))
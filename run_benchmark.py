@@ -6,15 +6,32 @@
 import tempfile
 import os
 import json
+import abc
+import contextlib
 import argparse
 import subprocess
 import csv
+import fcntl
 import glob
+import gzip
+import hashlib
+import io
 import logging
+import math
+import re
+import shutil
+import signal
+import stat
+import statistics
 import sys
+import threading
+import time
 import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from importlib import util as import_util
 from jsonschema import validate
+from utils.histogram import Histogram
 
 logger = logging.getLogger(__name__)
 sys.excepthook = lambda ex_type, ex, traceback: logger.error(
@@ -22,6 +39,10 @@ sys.excepthook = lambda ex_type, ex, traceback: logger.error(
 )
 
 RESULTS_ROOT_DIRECTORY = os.environ.get("PMEMKV_BENCH_RESULTS_DIR", "results")
+# Persistent cache is used only if its location is specified
+CACHE_ROOT_DIRECTORY = os.environ.get("PMEMKV_BENCH_CACHE_DIR")
+BUILD_CACHE_SIZE_GB = float(os.environ.get("PMEMKV_BENCH_BUILD_CACHE_SIZE_GB", "10"))
+POOL_CACHE_SIZE_GB = float(os.environ.get("PMEMKV_BENCH_POOL_CACHE_SIZE_GB", "1000"))
 
 
 class CmdLine:
@@ -48,13 +69,46 @@ class CmdLine:
         return self.cmdline[item]
 
 
-class Emon:
+class Collector(abc.ABC):
+    """Interface of data collectors, run along with the benchmark. System wide collectors
+    are started once for all runs of a test case, process collectors (PER_PROCESS)
+    are attached to each pmemkv_bench process. Raw data (returned by get_data) is saved
+    in ATTACHMENT file next to result.json, its parsed form is stored in the report."""
+
+    NAME = None
+    PER_PROCESS = False
+    ATTACHMENT = None
+
+    @abc.abstractmethod
+    def start(self, pid=None):
+        pass
+
+    @abc.abstractmethod
+    def stop(self, timeout=None):
+        pass
+
+    @abc.abstractmethod
+    def get_data(self):
+        pass
+
+    def parse(self, data):
+        """Returns structured (json serializable) form of the data or None"""
+        return None
+
+
+class Emon(Collector):
+    """Collects platform wide events using emon. Raw EDP output is saved as emon.dat,
+    memory bandwidth, LLC and pmem metrics computed from it are stored in the report."""
+
+    NAME = "emon"
+    ATTACHMENT = "emon.dat"
+
     def __init__(self):
         self.logger = logging.getLogger(type(self).__name__)
         self._emon_process = None
         self._log = tempfile.TemporaryFile()
 
-    def start(self):
+    def start(self, pid=None):
         logger.info("Start emon")
         cmd = "emon -collect-edp"
         self._emon_process = subprocess.Popen(cmd, stdout=self._log, shell=True)
@@ -77,9 +131,455 @@ class Emon:
             if self._emon_process.poll() is None:
                 self.stop(60)
 
+    # Metrics computed from rates (per second) of events, which are given as arguments
+    METRICS = {
+        "memory read bandwidth [MB/s]": (["UNC_M_CAS_COUNT.RD"], lambda rd: rd * 64e-6),
+        "memory write bandwidth [MB/s]": (
+            ["UNC_M_CAS_COUNT.WR"],
+            lambda wr: wr * 64e-6,
+        ),
+        # reads and writes of cache lines, sent by memory controllers to pmem
+        "pmem read bandwidth [MB/s]": (
+            ["UNC_M_PMM_RPQ_INSERTS"],
+            lambda rd: rd * 64e-6,
+        ),
+        "pmem write bandwidth [MB/s]": (
+            ["UNC_M_PMM_WPQ_INSERTS"],
+            lambda wr: wr * 64e-6,
+        ),
+        "LLC miss rate": (
+            ["LONGEST_LAT_CACHE.MISS", "LONGEST_LAT_CACHE.REFERENCE"],
+            lambda misses, references: misses / references,
+        ),
+        "LLC MPKI": (
+            ["LONGEST_LAT_CACHE.MISS", "INST_RETIRED.ANY"],
+            lambda misses, instructions: 1000 * misses / instructions,
+        ),
+        "IPC": (
+            ["INST_RETIRED.ANY", "CPU_CLK_UNHALTED.THREAD"],
+            lambda instructions, cycles: instructions / cycles,
+        ),
+    }
+
+    def parse(self, data):
+        """Returns metrics of the whole run and of each interval (loop over all event groups),
+        computed from EDP output. Metrics of events, which weren't collected, are skipped."""
+        if data is None:
+            return None
+        totals = {}
+        intervals = []
+        for interval in self.intervals(io.StringIO(data)):
+            intervals.append(self.metrics(interval))
+            for event, (count, seconds) in interval.items():
+                total = totals.get(event, (0, 0))
+                totals[event] = (total[0] + count, total[1] + seconds)
+        if not totals:
+            return None
+        summary = self.metrics(totals)
+        summary["intervals"] = intervals
+        return summary
+
+    @classmethod
+    def metrics(cls, events):
+        """Returns metrics computed from counts of events and times of their measurement"""
+        rates = {event: count / seconds for event, (count, seconds) in events.items()}
+        metrics = {"duration [s]": max(seconds for _, seconds in events.values())}
+        for name, (arguments, function) in cls.METRICS.items():
+            if all(event in rates for event in arguments):
+                try:
+                    metrics[name] = function(*[rates[event] for event in arguments])
+                except ZeroDivisionError:
+                    metrics[name] = None
+        return metrics
+
+    @staticmethod
+    def intervals(lines):
+        """Yields counts of events (summed over all cpus and uncore units) with time of their
+        measurement (in seconds) for each interval of EDP output, read line by line.
+        Event groups are multiplexed, so each event has its own time."""
+        tsc_frequency = None
+        seconds = None
+        interval = {}
+        for line in lines:
+            line = line.strip()
+            if line.startswith("TSC Freq"):
+                match = re.search(r"([\d.]+)\s*MHz", line)
+                if match:
+                    tsc_frequency = float(match[1]) * 1e6
+            elif re.fullmatch(r"={3,}", line):
+                if interval:
+                    yield interval
+                interval, seconds = {}, None
+            elif re.fullmatch(r"-{3,}", line):
+                seconds = None
+            elif re.fullmatch(r"[\d.]+\s*m?s real", line):
+                seconds = float(re.match(r"[\d.]+", line)[0])
+                seconds /= 1000 if "ms" in line else 1
+            else:
+                # event name, TSC cycles of the sample, counts of each cpu or unit
+                fields = line.split("\t")
+                if len(fields) < 3 or not re.fullmatch(
+                    r"[A-Z][A-Z0-9_.:=]*", fields[0]
+                ):
+                    continue
+                try:
+                    values = [float(field.replace(",", "")) for field in fields[1:]]
+                except ValueError:
+                    continue
+                duration = seconds
+                if duration is None and tsc_frequency:
+                    duration = values[0] / tsc_frequency
+                if not duration:
+                    continue
+                count, measured = interval.get(fields[0], (0, 0))
+                interval[fields[0]] = (count + sum(values[1:]), measured + duration)
+        if interval:
+            yield interval
+
+
+class PerfStat(Collector):
+    """Counts hardware and software events of the benchmark process using perf stat"""
+
+    NAME = "perf_stat"
+    PER_PROCESS = True
+    ATTACHMENT = "perf_stat.csv"
+    EVENTS = [
+        "cycles",
+        "instructions",
+        "LLC-load-misses",
+        "dTLB-load-misses",
+        "context-switches",
+    ]
+
+    def __init__(self, events=None):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.events = events or self.EVENTS
+        self._process = None
+        self._output = tempfile.NamedTemporaryFile(suffix=".csv")
+
+    def start(self, pid=None):
+        cmd = ["perf", "stat", "-x", ",", "-o", self._output.name]
+        cmd += ["-e", ",".join(self.events), "-p", str(pid)]
+        self.logger.info(f"Start perf stat: {cmd}")
+        self._process = subprocess.Popen(cmd)
+
+    def stop(self, timeout=None):
+        # perf stat prints counters when interrupted
+        if self._process.poll() is None:
+            self._process.send_signal(signal.SIGINT)
+        self._process.wait(timeout=timeout)
+
+    def get_data(self):
+        if self._process is None or self._process.poll() is None:
+            return None
+        self._output.seek(0)
+        return self._output.read().decode()
+
+    def parse(self, data):
+        """Returns counters by event names, unsupported or not counted events are None"""
+        if data is None:
+            return None
+        counters = {}
+        for fields in csv.reader(data.splitlines()):
+            if len(fields) < 3 or fields[0].startswith("#"):
+                continue
+            try:
+                counters[fields[2]] = float(fields[0])
+            except ValueError:
+                counters[fields[2]] = None
+        if counters.get("cycles") and counters.get("instructions") is not None:
+            counters["IPC"] = counters["instructions"] / counters["cycles"]
+        return counters
+
+
+class ProcSampler(Collector):
+    """Samples resource usage of the benchmark process (/proc/<pid>/stat, status and io)
+    and system wide memory statistics (/proc/vmstat) in a background thread. Samples are
+    saved as CSV time series, the report gets their summary."""
+
+    NAME = "proc"
+    PER_PROCESS = True
+    ATTACHMENT = "proc_samples.csv"
+    # fields of /proc/<pid>/stat (numbered from 1, as in proc(5))
+    STAT_FIELDS = {
+        "minflt": 10,
+        "majflt": 12,
+        "utime": 14,
+        "stime": 15,
+        "num_threads": 20,
+    }
+    STATUS_FIELDS = ["VmRSS", "VmHWM", "voluntary_ctxt_switches"]
+    IO_FIELDS = ["rchar", "wchar", "read_bytes", "write_bytes"]
+    VMSTAT_FIELDS = ["pgfault", "pgmajfault", "pswpin", "pswpout", "numa_miss"]
+
+    def __init__(self, interval=1.0):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+
+    def start(self, pid=None):
+        self.pid = pid
+        self._thread = threading.Thread(target=self._run)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                self.samples.append(self.sample())
+            except (FileNotFoundError, ProcessLookupError):
+                # process has finished
+                return
+            if self._stop.wait(self.interval):
+                return
+
+    def sample(self):
+        sample = {"time": time.monotonic()}
+        with open(f"/proc/{self.pid}/stat", "r") as stat_file:
+            # command name (in parentheses) may contain spaces
+            fields = stat_file.read().rpartition(")")[2].split()
+        if fields[0] == "Z":
+            raise ProcessLookupError(f"{self.pid} is a zombie")
+        for name, number in self.STAT_FIELDS.items():
+            sample[name] = int(fields[number - 3])
+        sample.update(self._read_fields(f"/proc/{self.pid}/status", self.STATUS_FIELDS))
+        try:
+            sample.update(self._read_fields(f"/proc/{self.pid}/io", self.IO_FIELDS))
+        except PermissionError:
+            pass
+        sample.update(self._read_fields("/proc/vmstat", self.VMSTAT_FIELDS))
+        return sample
+
+    @staticmethod
+    def _read_fields(path, names):
+        values = {}
+        with open(path, "r") as f:
+            for line in f:
+                name, _, value = line.replace(":", " ", 1).partition(" ")
+                if name in names:
+                    # memory sizes are given in kB
+                    values[name] = int(value.split()[0])
+        return values
+
+    def get_data(self):
+        if not self.samples:
+            return None
+        columns = list(self.samples[0].keys())
+        output = io.StringIO()
+        writer = csv.DictWriter(output, columns, extrasaction="ignore")
+        writer.writeheader()
+        start = self.samples[0]["time"]
+        for sample in self.samples:
+            writer.writerow(dict(sample, time=f"{sample['time'] - start:.3f}"))
+        return output.getvalue()
+
+    def parse(self, data):
+        """Returns summary of the samples: peak RSS, faults, cpu utilization and others"""
+        samples = list(csv.DictReader(io.StringIO(data)))
+        first, last = samples[0], samples[-1]
+        delta = (
+            lambda name: int(last[name]) - int(first[name]) if name in last else None
+        )
+        elapsed = float(last["time"])
+        cpu_seconds = (delta("utime") + delta("stime")) / self._clock_ticks
+        summary = {
+            "samples": len(samples),
+            "duration [s]": elapsed,
+            "peak RSS [kB]": max(
+                int(sample.get("VmHWM") or sample.get("VmRSS") or 0)
+                for sample in samples
+            ),
+            "minor faults": delta("minflt"),
+            "major faults": delta("majflt"),
+            "cpu utilization [%]": 100 * cpu_seconds / elapsed if elapsed else None,
+            "max threads": max(int(sample["num_threads"]) for sample in samples),
+            "voluntary context switches": delta("voluntary_ctxt_switches"),
+            "read bytes": delta("read_bytes"),
+            "write bytes": delta("write_bytes"),
+        }
+        for name in self.VMSTAT_FIELDS:
+            summary[f"vmstat {name}"] = delta(name)
+        return summary
+
+
+COLLECTORS = {collector.NAME: collector for collector in [Emon, PerfStat, ProcSampler]}
+
+
+def collector_specs(test_case):
+    """Returns (class, parameters) of collectors selected by test case. Collectors are given
+    by names or by objects with the name and parameters, e.g. {"name": "perf_stat",
+    "events": ["cycles"]}. Legacy "emon": "True" option selects emon."""
+    specs = [{"name": "emon"}] if test_case.get("emon") == "True" else []
+    for spec in test_case.get("collectors", []):
+        specs.append({"name": spec} if isinstance(spec, str) else spec)
+    result = []
+    for spec in specs:
+        params = dict(spec)
+        name = params.pop("name")
+        if name not in COLLECTORS:
+            raise ValueError(f"Unknown collector: {name}")
+        result.append((COLLECTORS[name], params))
+    return result
+
+
+def collect(collectors, subdirectory=""):
+    """Returns parsed data of stopped collectors and their attachments (by paths relative
+    to the results directory)"""
+    counters, attachments = {}, {}
+    for collector in collectors:
+        logger.info(f"Reading {collector.NAME} data...")
+        data = collector.get_data()
+        if data is None:
+            continue
+        if collector.ATTACHMENT:
+            attachments[os.path.join(subdirectory, collector.ATTACHMENT)] = data
+        parsed = collector.parse(data)
+        if parsed is not None:
+            counters[collector.NAME] = parsed
+    return counters, attachments
+
+
+class Profiler:
+    """Samples call stacks of pmemkv_bench with perf record, which wraps its command line.
+    Samples are post-processed (using perf script) into folded stacks (input of flamegraph.pl)
+    and a table of the hottest functions - both are saved next to result.json, the table
+    is stored also in the report."""
+
+    DATA_FILE = "perf.data"
+    FOLDED_ATTACHMENT = "profile.folded"
+    TOP_ATTACHMENT = "profile_top.csv"
+    TOP_COLUMNS = ["function", "self", "self [%]", "total", "total [%]"]
+
+    def __init__(
+        self, frequency=99, call_graph="fp", event=None, top=20, keep_data=False
+    ):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.frequency = frequency
+        self.call_graph = call_graph
+        self.event = event
+        self.top = top
+        self.keep_data = keep_data
+
+    @classmethod
+    def from_test_case(cls, test_case):
+        """Returns profiler configured by 'profile' option of the test case or None"""
+        params = test_case.get("profile")
+        if not params:
+            return None
+        return cls() if params is True else cls(**params)
+
+    def wrap(self, cmd, output_dir):
+        """Appends perf record (writing to the output directory) to the command"""
+        params = {
+            "record": "",
+            "--freq": self.frequency,
+            "--call-graph": self.call_graph,
+            "--output": os.path.join(output_dir, self.DATA_FILE),
+        }
+        if self.event:
+            params["--event"] = self.event
+        params["--"] = ""
+        cmd.append("perf", params)
+
+    def process(self, output_dir, subdirectory=""):
+        """Returns top functions and attachments (by paths relative to the results
+        directory) made of data recorded in the output directory"""
+        data_path = os.path.join(output_dir, self.DATA_FILE)
+        if not os.path.isfile(data_path):
+            self.logger.warning(f"No profile recorded in {output_dir}")
+            return None, {}
+        self.logger.info(f"Processing profile {data_path}")
+        try:
+            script = subprocess.run(
+                ["perf", "script", "--input", data_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=True,
+            )
+        except (subprocess.CalledProcessError, OSError) as e:
+            # results of the benchmark are still saved, recorded data is kept
+            stderr = getattr(e, "stderr", None) or b""
+            self.logger.warning(
+                f"Cannot process profile {data_path}: {e} {stderr.decode(errors='replace')}"
+            )
+            return None, {}
+        if not self.keep_data:
+            os.remove(data_path)
+        folded = self.fold(script.stdout.decode(errors="replace"))
+        top = self.top_functions(folded, self.top)
+
+        output = io.StringIO()
+        writer = csv.DictWriter(output, self.TOP_COLUMNS)
+        writer.writeheader()
+        writer.writerows(top)
+        attachments = {
+            os.path.join(subdirectory, self.FOLDED_ATTACHMENT): "".join(
+                f"{stack} {count}\n" for stack, count in folded.items()
+            ),
+            os.path.join(subdirectory, self.TOP_ATTACHMENT): output.getvalue(),
+        }
+        return top, attachments
+
+    @staticmethod
+    def fold(script_output):
+        """Returns numbers of samples by folded stacks ("comm;outermost;...;innermost")
+        from perf script output"""
+        folded = {}
+        frames = []
+        comm = None
+        for line in script_output.splitlines() + [""]:
+            if not line.strip():
+                if comm is not None:
+                    stack = ";".join([comm] + frames[::-1])
+                    folded[stack] = folded.get(stack, 0) + 1
+                comm, frames = None, []
+            elif not line[0].isspace():
+                # header of the sample: comm pid [cpu] time: period event:
+                comm = line.split()[0]
+            else:
+                # frame: address symbol+offset (dso)
+                fields = line.split(None, 1)
+                symbol, _, dso = fields[-1].rpartition(" (")
+                symbol = re.sub(r"\+0x[0-9a-f]+$", "", symbol)
+                if not symbol or symbol == "[unknown]":
+                    symbol = f"[{os.path.basename(dso.rstrip(')'))}]"
+                frames.append(symbol)
+        return folded
+
+    @staticmethod
+    def top_functions(folded, top=20):
+        """Returns functions with the most samples spent in them (self) and in their
+        callees (total)"""
+        samples = sum(folded.values())
+        self_samples, total_samples = {}, {}
+        for stack, count in folded.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            self_samples[frames[-1]] = self_samples.get(frames[-1], 0) + count
+            for function in set(frames):
+                total_samples[function] = total_samples.get(function, 0) + count
+        functions = sorted(self_samples, key=self_samples.get, reverse=True)[:top]
+        return [
+            {
+                "function": function,
+                "self": self_samples[function],
+                "self [%]": 100 * self_samples[function] / samples,
+                "total": total_samples[function],
+                "total [%]": 100 * total_samples[function] / samples,
+            }
+            for function in functions
+        ]
+
 
 class Repository:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, mirrors_path: str = None):
         self.logger = logging.getLogger(type(self).__name__)
 
         self.url = config["repo_url"]
@@ -88,6 +588,11 @@ class Repository:
         )
         self.path = self.directory.name
         self.commit = config["commit"]
+        self.mirror = None
+        if mirrors_path:
+            url_hash = hashlib.sha256(self.url.encode()).hexdigest()[:16]
+            name = os.path.basename(self.url.rstrip("/"))
+            self.mirror = os.path.join(mirrors_path, f"{url_hash}-{name}")
         self.clone()
         self.checkout()
         config["commit"] = self._resolve_sha()
@@ -101,8 +606,63 @@ class Repository:
         )
 
     def clone(self):
-        self.logger.info(f"Cloning repository: {self.url}")
-        subprocess.run("git clone".split() + [self.url, self.path], check=True)
+        if not self.mirror:
+            self.logger.info(f"Cloning repository: {self.url}")
+            subprocess.run("git clone".split() + [self.url, self.path], check=True)
+            return
+
+        self.update_mirror()
+        self.logger.info(f"Cloning repository: {self.url} from mirror: {self.mirror}")
+        # Objects are borrowed from the mirror, nothing is copied nor downloaded
+        subprocess.run(
+            "git clone --shared".split() + [self.mirror, self.path], check=True
+        )
+        subprocess.run(
+            "git remote set-url origin".split() + [self.url],
+            cwd=self.path,
+            check=True,
+        )
+
+    def update_mirror(self):
+        os.makedirs(os.path.dirname(self.mirror), exist_ok=True)
+        with open(f"{self.mirror}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.isdir(self.mirror):
+                self.logger.info(f"Creating mirror of repository: {self.url}")
+                subprocess.run(
+                    "git clone --mirror".split() + [self.url, self.mirror], check=True
+                )
+                return
+
+            # Commit sha can't change its meaning, so there is no need to fetch it again
+            if re.fullmatch("[0-9a-f]{40}", self.commit) and self._mirrored():
+                self.logger.info(f"Commit {self.commit} found in mirror: {self.mirror}")
+                return
+
+            self.logger.info(f"Fetching repository: {self.url} into: {self.mirror}")
+            fetch = subprocess.run("git remote update --prune".split(), cwd=self.mirror)
+            if fetch.returncode != 0:
+                if not self._mirrored():
+                    fetch.check_returncode()
+                self.logger.warning(
+                    f"Cannot fetch {self.url}, using mirrored state of {self.commit}"
+                )
+
+    def _mirrored(self):
+        return (
+            subprocess.run(
+                [
+                    "git",
+                    "rev-parse",
+                    "--verify",
+                    "--quiet",
+                    f"{self.commit}^{{commit}}",
+                ],
+                cwd=self.mirror,
+                stdout=subprocess.DEVNULL,
+            ).returncode
+            == 0
+        )
 
     def _resolve_sha(self):
         rev_parsed_commit = subprocess.run(
@@ -118,32 +678,178 @@ class Repository:
         return rev_parsed_commit
 
 
+class BuildCache:
+    """Persistent storage of build artifacts (and pool snapshots). Each entry is a directory
+    named after the hash of everything, which may affect the build output. When the cache
+    grows over the size limit, least recently used entries are evicted."""
+
+    COMPLETE_MARK = ".complete"
+
+    def __init__(self, path, max_size_gb):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.path = path
+        self.max_size = max_size_gb * 1024 ** 3
+        # entries used in the current session are never evicted
+        self._used = set()
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def key(*components):
+        return _digest(*components)
+
+    def entry(self, key):
+        self._used.add(key)
+        return os.path.join(self.path, key)
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        """Serializes filling of the entry between threads and processes sharing the cache"""
+        with open(os.path.join(self.path, f"{key}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def restore(self, key):
+        """Returns True if complete entry exists and marks it as recently used"""
+        mark = os.path.join(self.entry(key), self.COMPLETE_MARK)
+        if not os.path.isfile(mark):
+            return False
+        os.utime(mark)
+        self.logger.info(f"Using cached artifacts: {self.entry(key)}")
+        return True
+
+    def prepare(self, key):
+        """Returns empty entry directory, leftovers of interrupted builds are removed"""
+        path = self.entry(key)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+    def commit(self, key):
+        open(os.path.join(self.entry(key), self.COMPLETE_MARK), "w").close()
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            mark = os.path.join(self.path, name, self.COMPLETE_MARK)
+            if not os.path.isfile(mark):
+                continue
+            size = _directory_size(os.path.join(self.path, name))
+            entries.append((os.path.getmtime(mark), name, size))
+        total = sum(size for _, _, size in entries)
+        for _, name, size in sorted(entries):
+            if total <= self.max_size:
+                break
+            if name in self._used:
+                continue
+            self.logger.info(f"Evicting cached artifacts: {name}")
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+            total -= size
+
+
+def _digest(*components):
+    serialized = json.dumps(components, sort_keys=True)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def _directory_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            size += os.lstat(os.path.join(root, f)).st_size
+    return size
+
+
+@lru_cache(maxsize=None)
+def _toolchain(*compilers):
+    """Returns version strings of the compilers, so artifacts are not shared between
+    toolchains (e.g. after a compiler upgrade)"""
+    versions = []
+    for compiler in compilers:
+        try:
+            version = subprocess.run(
+                [compiler, "--version"],
+                capture_output=True,
+                universal_newlines=True,
+            ).stdout
+        except OSError:
+            version = None
+        versions.append([compiler, version])
+    return versions
+
+
+def _cpu_model():
+    with open("/proc/cpuinfo", "r") as cpuinfo:
+        for line in cpuinfo:
+            if line.startswith("model name"):
+                return line.split(":", 1)[1].strip()
+    return None
+
+
 class CmakeProject:
-    def __init__(self, config: dict, dependencies: list = []):
+    def __init__(
+        self,
+        config: dict,
+        dependencies: list = [],
+        cache: BuildCache = None,
+        repo: Repository = None,
+    ):
         self.logger = logging.getLogger(type(self).__name__)
 
-        self.repo = Repository(config)
+        self.repo = repo or Repository(config)
         self.path = self.repo.path
-        self.install_dir = tempfile.TemporaryDirectory()
-        self.install_path = self.install_dir.name
         self.deps = dependencies
-        self.pkg_config_path = [self.path]
-        for d in self.deps:
-            self.pkg_config_path.extend(d.pkg_config_path)
+        self.cache = cache
+
+        # Build output depends only on sources, build parameters, toolchain and dependencies
+        self.artifact_key = BuildCache.key(
+            config["commit"],
+            config["cmake_params"],
+            config["env"],
+            # cmake picks up compilers from the build environment only
+            _toolchain(config["env"].get("CC", "cc"), config["env"].get("CXX", "c++")),
+            [d.artifact_key for d in self.deps],
+        )
+        if self.cache:
+            self.install_path = self.cache.entry(self.artifact_key)
+        else:
+            self.install_dir = tempfile.TemporaryDirectory()
+            self.install_path = self.install_dir.name
 
         # Configure Build environment
-        self.build_env = config["env"]
-        self.build_env["PKG_CONFIG_PATH"] = self.format_pkg_config_path()
+        self.build_env = dict(config["env"])
         self.build_env["PATH"] = os.environ["PATH"]
         self.cmake_params = [f"-DCMAKE_INSTALL_PREFIX={self.install_path}"] + config[
             "cmake_params"
         ]
 
+    def pkg_config_path(self):
+        pc_dirs = set(
+            os.path.dirname(x)
+            for x in glob.glob(self.install_path + "/**/*.pc", recursive=True)
+        )
+        path = [self.path] + sorted(pc_dirs)
+        for d in self.deps:
+            path.extend(d.pkg_config_path())
+        return path
+
     def format_pkg_config_path(self):
-        return ":".join(path for path in self.pkg_config_path)
+        return ":".join(path for path in self.pkg_config_path())
 
-    def build(self):
-        cpus = f"{os.cpu_count()}"
+    def build(self, jobs=None):
+        if not self.cache:
+            self._build(jobs)
+            return
+        with self.cache.lock(self.artifact_key):
+            if self.cache.restore(self.artifact_key):
+                return
+            self.cache.prepare(self.artifact_key)
+            self._build(jobs)
+            self.cache.commit(self.artifact_key)
+
+    def _build(self, jobs):
+        cpus = f"{jobs or os.cpu_count()}"
+        self.build_env["PKG_CONFIG_PATH"] = self.format_pkg_config_path()
         self.logger.info(f"{self.build_env=}")
         self.logger.info(f"Building repo {self.repo}")
         try:
@@ -166,16 +872,45 @@ class CmakeProject:
 
 
 class DB_bench:
-    def __init__(self, config: dict, pmemkv: CmakeProject):
+    BINARY = "pmemkv_bench"
+    INTERVALS_FILE = "intervals.csv"
+    HISTOGRAMS_FILE = "histograms.jsonl"
+
+    def __init__(
+        self,
+        config: dict,
+        pmemkv: CmakeProject,
+        cache: BuildCache = None,
+        repo: Repository = None,
+    ):
         self.logger = logging.getLogger(type(self).__name__)
 
-        self.repo = Repository(config)
+        self.repo = repo or Repository(config)
         self.path = self.repo.path
         self.pmemkv = pmemkv
-        self.run_output = None
         self.env = config["env"]
+        self.cache = cache
+        # binary is built with -march=native, so it's specific to the cpu model
+        self.artifact_key = BuildCache.key(
+            config["commit"], pmemkv.artifact_key, _cpu_model(), _toolchain("g++")
+        )
 
     def build(self):
+        if not self.cache:
+            self._build()
+            return
+        binary_path = os.path.join(self.path, self.BINARY)
+        with self.cache.lock(self.artifact_key):
+            if self.cache.restore(self.artifact_key):
+                cached = os.path.join(self.cache.entry(self.artifact_key), self.BINARY)
+                shutil.copy2(cached, binary_path)
+                return
+            self._build()
+            entry = self.cache.prepare(self.artifact_key)
+            shutil.copy2(binary_path, entry)
+            self.cache.commit(self.artifact_key)
+
+    def _build(self):
         build_env = {
             "PATH": os.environ["PATH"],
             "PKG_CONFIG_PATH": self.pmemkv.format_pkg_config_path(),
@@ -193,7 +928,17 @@ class DB_bench:
             self.logger.error(f"Cannot build benchmark: {e}")
             raise e
 
-    def run(self, environ, benchmark_params, numactl_params=None):
+    def run(
+        self,
+        environ,
+        benchmark_params,
+        numactl_params=None,
+        output_dir=None,
+        timeout=None,
+        progress_timeout=None,
+        collectors=[],
+        profiler=None,
+    ):
         find_file_path = lambda root_dir, filename: ":".join(
             set(
                 os.path.dirname(x)
@@ -206,25 +951,36 @@ class DB_bench:
         env["PATH"] = self.path + ":" + os.environ["PATH"]
         env["LD_LIBRARY_PATH"] = find_file_path(self.pmemkv.install_path, "*.so.*")
         self.logger.debug(f"{env=}")
+        if "--report_interval_ms" in benchmark_params and output_dir:
+            report_file = os.path.join(output_dir, self.INTERVALS_FILE)
+            benchmark_params = dict({"--report_file": report_file}, **benchmark_params)
         cmd = CmdLine()
         if numactl_params:
             cmd.append("numactl", numactl_params)
+        if profiler:
+            profiler.wrap(cmd, output_dir)
         cmd.append("pmemkv_bench", benchmark_params)
         logger.info(cmd)
 
+        process = BenchmarkProcess(cmd, self.path, env, output_dir)
+        # wrapped benchmark is run in a child process of the profiler
+        pid = process.find(self.BINARY) if profiler and collectors else process.pid
+        for collector in collectors:
+            collector.start(pid)
         try:
-            self.run_output = subprocess.run(
-                cmd,
-                cwd=self.path,
-                env=env,
-                capture_output=True,
-                check=True,
+            process.wait(timeout, progress_timeout)
+        finally:
+            for collector in collectors:
+                collector.stop(60)
+        if process.killed:
+            self.logger.error(f"Benchmark process killed: {process.killed}")
+        elif process.returncode != 0:
+            self.logger.error(f"Benchmark process failed: {process.stdout}")
+            self.logger.error(f"With error: {process.stderr}")
+            raise subprocess.CalledProcessError(
+                process.returncode, cmd.cmdline, process.stdout, process.stderr
             )
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Benchmark process failed: {e.stdout}")
-            self.logger.error(f"With error: {e.stderr}")
-            self.logger.error(f"Run output: {self.run_output}")
-            raise e
+        return process
 
     def cleanup(self, benchmark_params):
         db_path = benchmark_params["--db"]
@@ -232,30 +988,910 @@ class DB_bench:
             subprocess.run(["pmempool", "rm", db_path], cwd=self.path, check=True)
         self.logger.info(f"{db_path} cleaned")
 
-    def get_results(self):
-        OutputReader = csv.DictReader(
-            self.run_output.stdout.decode("UTF-8").split("\n"), delimiter=","
+    def get_results(self, run_output):
+        return run_output.rows
+
+    def get_histograms(self, output_dir):
+        """Returns histograms (written with --histogram_file) by sequence ids of benchmarks"""
+        histograms_path = os.path.join(output_dir, self.HISTOGRAMS_FILE)
+        if not os.path.isfile(histograms_path):
+            return {}
+        with open(histograms_path, "r") as histograms:
+            lines = [json.loads(line) for line in histograms if line.strip()]
+        return {str(line["sequence_id"]): line["histogram"] for line in lines}
+
+    def get_intervals(self, output_dir):
+        """Returns interval reports (written with --report_interval_ms) or None"""
+        intervals_path = os.path.join(output_dir, self.INTERVALS_FILE)
+        if not os.path.isfile(intervals_path):
+            return None
+        with open(intervals_path, "r") as intervals:
+            return list(csv.DictReader(intervals))
+
+
+class BenchmarkProcess:
+    """Runs benchmark process and streams its output (through background readers) to files
+    in output directory, as it arrives. CSV rows printed on stdout are parsed on the fly,
+    so results of benchmarks finished before the process had to be killed are available.
+    Each row may be preceded by its own header (starting with the same id column)."""
+
+    KILL_GRACE_PERIOD = 10
+
+    def __init__(self, cmd, cwd, env, output_dir=None):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.rows = []
+        self.killed = None
+        self._header = None
+        self._lines = {"stdout": [], "stderr": []}
+        self.last_output = time.monotonic()
+        # New session makes the process a group leader, so whole tree can be killed at once
+        self.process = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
         )
-        return [x for x in OutputReader]
+        self._readers = [
+            threading.Thread(
+                target=self._read, args=(self.process.stdout, "stdout", output_dir)
+            ),
+            threading.Thread(
+                target=self._read, args=(self.process.stderr, "stderr", output_dir)
+            ),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def find(self, name, timeout=10):
+        """Returns pid of the process with given name in the session of the benchmark process
+        (e.g. of the benchmark run by a wrapper) or pid of the main process, if it's not found
+        within timeout"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.process.poll() is None:
+            for stat_path in glob.glob("/proc/[0-9]*/stat"):
+                try:
+                    with open(stat_path, "r") as stat_file:
+                        comm, _, fields = stat_file.read().rpartition(")")
+                except OSError:
+                    continue
+                # fields after comm: state ppid pgrp session
+                if (
+                    comm.partition("(")[2] == name
+                    and int(fields.split()[3]) == self.pid
+                ):
+                    return int(os.path.basename(os.path.dirname(stat_path)))
+            time.sleep(0.01)
+        self.logger.warning(f"Process {name} not found, using {self.pid}")
+        return self.pid
+
+    @property
+    def returncode(self):
+        return self.process.returncode
+
+    @property
+    def stdout(self):
+        return b"".join(self._lines["stdout"])
+
+    @property
+    def stderr(self):
+        return b"".join(self._lines["stderr"])
+
+    def _read(self, stream, name, output_dir):
+        output_file = None
+        if output_dir:
+            output_file = open(os.path.join(output_dir, f"pmemkv_bench.{name}"), "wb")
+        try:
+            for line in iter(stream.readline, b""):
+                self.last_output = time.monotonic()
+                self._lines[name].append(line)
+                if output_file:
+                    output_file.write(line)
+                    output_file.flush()
+                if name == "stdout":
+                    self._parse(line)
+        finally:
+            if output_file:
+                output_file.close()
+
+    def _parse(self, line):
+        line = line.decode("UTF-8").rstrip("\r\n")
+        if not line:
+            return
+        fields = next(csv.reader([line], delimiter=","))
+        if self._header is None or fields[0] == self._header[0]:
+            self._header = fields
+        else:
+            row = dict(zip(self._header, fields))
+            self.logger.info(f"Result: {row}")
+            self.rows.append(row)
+
+    def wait(self, timeout=None, progress_timeout=None):
+        """Waits for the process. It's killed, if it runs longer than timeout
+        or doesn't print anything for progress_timeout seconds."""
+        start = time.monotonic()
+        while self.process.poll() is None:
+            now = time.monotonic()
+            if timeout and now - start > timeout:
+                self.kill(f"exceeded timeout of {timeout} s")
+            elif progress_timeout and now - self.last_output > progress_timeout:
+                self.kill(f"no output for {progress_timeout} s")
+            time.sleep(0.1)
+        for reader in self._readers:
+            reader.join()
+        return self.returncode
+
+    def kill(self, reason):
+        if self.killed:
+            return
+        self.killed = reason
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(self.KILL_GRACE_PERIOD)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class BuildGraph:
+    """Executes build steps as a dependency graph. Each step starts as soon as all of its
+    dependencies are finished, so independent steps run concurrently. Available cpus are
+    split between compilation steps, which are started at the same time."""
+
+    def __init__(self, cpus=None):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.cpus = cpus or os.cpu_count()
+        self.steps = {}
+
+    def add(self, name, action, dependencies=[], compilation=False):
+        """Action is called with results of dependencies as positional arguments.
+        Compilation steps get additionally 'jobs' keyword argument."""
+        self.steps[name] = (action, dependencies, compilation)
+
+    def run(self):
+        results = {}
+        running = {}
+        pending = dict(self.steps)
+        with ThreadPoolExecutor(max_workers=max(1, len(self.steps))) as executor:
+            while pending or running:
+                ready = [
+                    name
+                    for name, (_, deps, _) in pending.items()
+                    if all(d in results for d in deps)
+                ]
+                compilations = [
+                    name
+                    for name in ready + list(running.values())
+                    if self.steps[name][2]
+                ]
+                for name in ready:
+                    action, deps, compilation = pending.pop(name)
+                    kwargs = {}
+                    if compilation:
+                        kwargs["jobs"] = max(1, self.cpus // len(compilations))
+                    self.logger.info(f"Starting step: {name} {kwargs}")
+                    future = executor.submit(
+                        action, *[results[d] for d in deps], **kwargs
+                    )
+                    running[future] = name
+                if not running:
+                    raise ValueError(
+                        f"Unresolvable dependencies of steps: {list(pending)}"
+                    )
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    self.logger.info(f"Finished step: {name}")
+        return results
+
+
+class Session:
+    """Manifest of a benchmarking session, stored next to the results. Test cases are identified
+    by hash of their runtime parameters and build configuration, so cases completed before
+    may be skipped when the session is resumed. Identical test cases listed more than once
+    are all run, only cases completed by earlier runs of the session are skipped."""
+
+    def __init__(self, name=None):
+        self.logger = logging.getLogger(type(self).__name__)
+        self._lock = threading.Lock()
+        self.cases = {}
+        self.resumed_cases = {}
+        if name:
+            self.name = name
+            self.path = self.manifest_path(name)
+            if not os.path.isfile(self.path):
+                raise ValueError(
+                    f"Cannot resume session: {name}, no manifest: {self.path}"
+                )
+            with open(self.path, "r") as manifest:
+                self.cases = json.load(manifest)["cases"]
+            self.resumed_cases = dict(self.cases)
+            self.logger.info(f"Resuming session: {name} ({len(self.cases)} done)")
+        else:
+            self.name = datetime.datetime.now().strftime("%y%m%d_%H%M%S_%f")
+            self.path = self.manifest_path(self.name)
+            self.logger.info(f"Starting session: {self.name}")
+
+    @staticmethod
+    def manifest_path(name):
+        return os.path.join(RESULTS_ROOT_DIRECTORY, "sessions", f"{name}.json")
+
+    @staticmethod
+    def case_id(build_configuration, test_case):
+        return _digest(build_configuration, test_case)
+
+    def completed(self, case_id):
+        """Returns path to results of test case completed before resuming the session or None"""
+        results_path = self.resumed_cases.get(case_id, {}).get("results_path")
+        if results_path and os.path.isfile(os.path.join(results_path, "result.json")):
+            return results_path
+        return None
+
+    def complete(self, case_id, results_path):
+        with self._lock:
+            self.cases[case_id] = {"results_path": results_path}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # Replace manifest atomically, so it's never left half-written
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as manifest:
+                json.dump(
+                    {"session": self.name, "cases": self.cases}, manifest, indent=4
+                )
+            os.replace(tmp_path, self.path)
+
+
+class Scheduler:
+    """Runs test cases concurrently, as long as they don't compete for resources. Resources
+    of a test case are numa nodes of its numactl cpu binding and the device of its pool.
+    Test cases without cpu binding or with system wide collectors (e.g. emon) enabled
+    are run exclusively. Test cases sharing resources are run in the original order."""
+
+    NODE_BINDINGS = ["--cpubind", "--cpunodebind", "-N"]
+    CPU_BINDINGS = ["--physcpubind", "-C"]
+
+    def __init__(self, parallel=False):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.parallel = parallel
+
+    @staticmethod
+    def resources(test_case):
+        """Returns set of resources used by test case, None means the whole platform"""
+        numactl = test_case.get("numactl") or {}
+        if any(not cls.PER_PROCESS for cls, _ in collector_specs(test_case)):
+            return None
+        nodes = set()
+        for param in Scheduler.NODE_BINDINGS:
+            if param in numactl:
+                binding = numactl[param]
+                if binding.startswith("file:"):
+                    nodes.add(_path_node(binding[len("file:") :]))
+                else:
+                    nodes.update(_parse_list(binding))
+        for param in Scheduler.CPU_BINDINGS:
+            if param in numactl:
+                cpu_nodes = _cpu_nodes()
+                nodes.update(cpu_nodes.get(cpu) for cpu in _parse_list(numactl[param]))
+        if not nodes or None in nodes:
+            return None
+
+        resources = set(f"node:{node}" for node in nodes)
+        db_path = test_case["pmemkv_bench"].get("--db")
+        if db_path:
+            resources.add(f"device:{_mount_point(db_path)}")
+        return resources
+
+    def run(self, action, test_cases):
+        """Calls action for each test case and returns list of results (in the same order)"""
+        if not self.parallel:
+            return [action(test_case) for test_case in test_cases]
+
+        resources = [self.resources(test_case) for test_case in test_cases]
+        conflict = lambda a, b: a is None or b is None or bool(a & b)
+        results = [None] * len(test_cases)
+        pending = list(range(len(test_cases)))
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(test_cases))) as executor:
+            while pending or running:
+                blocked = []
+                for i in list(pending):
+                    busy = [resources[j] for j in list(running.values()) + blocked]
+                    if any(conflict(resources[i], r) for r in busy):
+                        blocked.append(i)
+                        if resources[i] is None:
+                            break
+                        continue
+                    self.logger.info(f"Starting test case {i} on: {resources[i]}")
+                    pending.remove(i)
+                    running[executor.submit(action, test_cases[i])] = i
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return results
+
+
+def _parse_list(value):
+    """Parses numactl style list of numbers, e.g. '0-3,8'"""
+    numbers = set()
+    for part in value.split(","):
+        if not re.fullmatch("[0-9]+(-[0-9]+)?", part):
+            return {None}
+        first, _, last = part.partition("-")
+        numbers.update(range(int(first), int(last or first) + 1))
+    return numbers
+
+
+def _cpu_nodes():
+    cpu_nodes = {}
+    for node_path in glob.glob("/sys/devices/system/node/node[0-9]*"):
+        node = int(os.path.basename(node_path)[len("node") :])
+        with open(os.path.join(node_path, "cpulist"), "r") as cpulist:
+            for cpu in _parse_list(cpulist.read().strip()):
+                cpu_nodes[cpu] = node
+    return cpu_nodes
+
+
+def _mount_point(path):
+    path = os.path.realpath(path)
+    if path.startswith("/dev/"):
+        # device dax is the device itself
+        return path
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    while not os.path.ismount(path):
+        path = os.path.dirname(path)
+    return path
+
+
+def _path_node(path):
+    """Returns numa node of the block device, which holds the path"""
+    mount_point = _mount_point(path)
+    device = mount_point
+    if not mount_point.startswith("/dev/"):
+        with open("/proc/mounts", "r") as mounts:
+            for line in mounts:
+                fields = line.split()
+                if fields[1] == mount_point:
+                    device = fields[0]
+    device_name = os.path.basename(os.path.realpath(device))
+    for node_file in [
+        f"/sys/class/block/{device_name}/device/numa_node",
+        f"/sys/class/dax/{device_name}/device/numa_node",
+    ]:
+        if os.path.isfile(node_file):
+            with open(node_file, "r") as f:
+                node = int(f.read())
+                return node if node >= 0 else None
+    return None
+
+
+class PoolSnapshots:
+    """Snapshots of pools filled by the first benchmark of a test case (fillseq or fillrandom).
+    Test cases with the same fill phase restore the snapshot and run only the remaining,
+    measured benchmarks. Pool files are copied using reflinks, if filesystem supports them
+    (sparse copy otherwise), images of device dax are saved with daxio."""
+
+    FILL_BENCHMARKS = ["fillseq", "fillrandom"]
+    # Parameters, which don't affect content of the filled pool (all others do, or may)
+    REPORTING_PARAMS = [
+        "--benchmarks",
+        "--db",
+        "--histogram",
+        "--histogram_file",
+        "--per_thread",
+        "--latency_sampling",
+        "--latency_sampling_random",
+        "--report_interval_ms",
+        "--report_file",
+    ]
+    POOL = "pool"
+
+    def __init__(self, cache: BuildCache):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.cache = cache
+
+    @classmethod
+    def fill_phase(cls, benchmark_params):
+        """Returns fill benchmark and remaining ones, if the test case starts with a fill"""
+        fill, _, measured = benchmark_params["--benchmarks"].partition(",")
+        if fill not in cls.FILL_BENCHMARKS or not measured:
+            return None
+        return fill, measured
+
+    def key(self, benchmark, benchmark_params, kind):
+        fill, _ = self.fill_phase(benchmark_params)
+        params = {
+            name: value
+            for name, value in benchmark_params.items()
+            if name not in self.REPORTING_PARAMS
+        }
+        # sizes are read from the file (relative to the benchmark's cwd), not its path
+        distribution = params.get("--value_size_distribution", "")
+        if distribution.startswith("file:"):
+            path = os.path.join(benchmark.path, distribution[len("file:") :])
+            with open(path, "rb") as sizes:
+                content = hashlib.sha256(sizes.read()).hexdigest()
+            params["--value_size_distribution"] = [distribution, content]
+        # image of device dax may be restored only on the same device
+        location = benchmark_params["--db"] if kind == "devdax" else None
+        return BuildCache.key(benchmark.artifact_key, fill, params, kind, location)
+
+    def prepare(self, benchmark, test_case):
+        """Makes the pool filled (by restoring its snapshot or running the fill benchmark
+        and saving the snapshot) and returns parameters of the measured benchmarks"""
+        benchmark_params = test_case["pmemkv_bench"]
+        phases = self.fill_phase(benchmark_params)
+        if phases is None:
+            self.logger.warning(
+                "Snapshot requires fillseq or fillrandom followed by other benchmarks"
+            )
+            return benchmark_params
+        fill, measured = phases
+        # content of time bounded fill depends on the speed of the run
+        if int(benchmark_params.get("--duration", 0)):
+            self.logger.warning(
+                "Snapshot of fill limited by --duration is not supported"
+            )
+            return benchmark_params
+        db_path = benchmark_params["--db"]
+        kind = _pool_kind(db_path)
+        if kind is None:
+            self.logger.warning(f"Snapshot of {db_path} is not supported")
+            return benchmark_params
+
+        key = self.key(benchmark, benchmark_params, kind)
+        with self.cache.lock(key):
+            if self.cache.restore(key):
+                self.logger.info(f"Restoring pool snapshot: {db_path}")
+                self._copy(
+                    kind, os.path.join(self.cache.entry(key), self.POOL), db_path
+                )
+            else:
+                self._fill(
+                    benchmark,
+                    test_case,
+                    dict(benchmark_params, **{"--benchmarks": fill}),
+                )
+                self.logger.info(f"Saving pool snapshot: {db_path}")
+                entry = self.cache.prepare(key)
+                self._copy(kind, db_path, os.path.join(entry, self.POOL))
+                self.cache.commit(key)
+        return dict(benchmark_params, **{"--benchmarks": measured})
+
+    def _fill(self, benchmark, test_case, benchmark_params):
+        process = benchmark.run(
+            test_case["env"],
+            benchmark_params,
+            numactl_params=test_case.get("numactl"),
+            timeout=test_case.get("timeout"),
+            progress_timeout=test_case.get("progress_timeout"),
+        )
+        if process.killed:
+            raise RuntimeError(f"Cannot fill the pool: {process.killed}")
+
+    @staticmethod
+    def _copy(kind, source, destination):
+        if kind == "devdax":
+            cmd = ["daxio", f"--input={source}", f"--output={destination}"]
+        else:
+            if os.path.isfile(destination):
+                os.remove(destination)
+            cmd = ["cp", "--reflink=auto", "--sparse=always", source, destination]
+        subprocess.run(cmd, check=True)
+
+
+def _pool_kind(path):
+    """Returns "devdax" or "file" for pools, which may be snapshotted, None otherwise
+    (e.g. poolsets or directories used by volatile engines)"""
+    if os.path.exists(path):
+        mode = os.stat(path).st_mode
+        if stat.S_ISCHR(mode):
+            return "devdax"
+        if not stat.S_ISREG(mode):
+            return None
+        with open(path, "rb") as pool:
+            if pool.read(len(b"PMEMPOOLSET")) == b"PMEMPOOLSET":
+                return None
+    return "file"
+
+
+def run_test_case(benchmark, config, test_case, session, snapshots=None):
+    case_id = Session.case_id(config, test_case)
+    results_path = session.completed(case_id)
+    if results_path:
+        logger.info(f"Skipping completed: {test_case}")
+        return load_results(results_path)
+
+    specs = collector_specs(test_case)
+    profiler = Profiler.from_test_case(test_case)
+    system_collectors = [cls(**params) for cls, params in specs if not cls.PER_PROCESS]
+    for collector in system_collectors:
+        logger.info(f"Starting {collector.NAME}...")
+        collector.start()
+    results_path = create_results_directory()
+    repetition = Repetition(test_case)
+    runs = []
+    run_intervals = []
+    run_counters = []
+    run_profiles = []
+    attachments = {}
+    while True:
+        subdirectory = f"repetition_{len(runs)}" if repetition.repeated else ""
+        output_dir = os.path.join(results_path, subdirectory)
+        os.makedirs(output_dir, exist_ok=True)
+        benchmark_params = test_case["pmemkv_bench"]
+        if test_case.get("snapshot") and snapshots:
+            benchmark_params = snapshots.prepare(benchmark, test_case)
+        if test_case.get("histograms"):
+            histograms_path = os.path.join(output_dir, DB_bench.HISTOGRAMS_FILE)
+            benchmark_params = dict(
+                benchmark_params, **{"--histogram_file": histograms_path}
+            )
+        process_collectors = [cls(**params) for cls, params in specs if cls.PER_PROCESS]
+        logger.info(f"Running: {test_case}")
+        run_output = benchmark.run(
+            test_case["env"],
+            benchmark_params,
+            numactl_params=test_case.get("numactl"),
+            output_dir=output_dir,
+            timeout=test_case.get("timeout"),
+            progress_timeout=test_case.get("progress_timeout"),
+            collectors=process_collectors,
+            profiler=profiler,
+        )
+        if test_case.get("cleanup", 0) != 0:
+            logger.info("Doing cleanup...")
+            benchmark.cleanup(test_case["pmemkv_bench"])
+        results = benchmark.get_results(run_output)
+        histograms = benchmark.get_histograms(output_dir)
+        for row in results:
+            if row.get("sequence_id") in histograms:
+                row["histogram"] = histograms[row["sequence_id"]]
+        runs.append(results)
+        run_intervals.append(benchmark.get_intervals(output_dir))
+        counters, run_attachments = collect(process_collectors, subdirectory)
+        run_counters.append(counters)
+        attachments.update(run_attachments)
+        if profiler:
+            profile, run_attachments = profiler.process(output_dir, subdirectory)
+            run_profiles.append(profile)
+            attachments.update(run_attachments)
+        if run_output.killed or repetition.done(runs):
+            break
+    for collector in system_collectors:
+        logger.info(f"Stopping {collector.NAME}...")
+        collector.stop()
+    benchmark_results = runs[0]
+    if repetition.repeated:
+        benchmark_results = repetition.aggregate(runs)
+
+    report = {}
+    report["build_configuration"] = config
+    report["runtime_parameters"] = test_case
+    report["results"] = benchmark_results
+    if repetition.repeated:
+        report["samples"] = runs
+    if run_output.killed:
+        report["killed"] = run_output.killed
+    if any(run_profiles):
+        report["profile"] = run_profiles if repetition.repeated else run_profiles[0]
+    if any(run_intervals):
+        report["intervals"] = run_intervals if repetition.repeated else run_intervals[0]
+
+    counters, system_attachments = collect(system_collectors)
+    attachments.update(system_attachments)
+    # Counters of process collectors are listed per run, when the test case is repeated
+    for name in set(name for run in run_counters for name in run):
+        values = [run.get(name) for run in run_counters]
+        counters[name] = values if repetition.repeated else values[0]
+    if counters:
+        report["counters"] = counters
+
+    logger.info("Run results:")
+    print_results(report)
+
+    save_results(report, results_path=results_path, attachments=attachments)
+    # Killed test cases are repeated, when the session is resumed
+    if not run_output.killed:
+        session.complete(case_id, results_path)
+    return report
+
+
+class Repetition:
+    """Controls repetitions of a test case. It's repeated fixed number of times ('repeat')
+    or, in adaptive mode ('repeat_adaptive'), until confidence intervals of ops/sec
+    and P99.9 latency are narrower than target width (relative to the mean)."""
+
+    CONVERGENCE_COLUMNS = ["ops/sec", "Percentile P99.900000 [micros/op]"]
+
+    def __init__(self, test_case):
+        self.repeat = test_case.get("repeat", 1)
+        self.adaptive = test_case.get("repeat_adaptive")
+        self.confidence = 0.95
+        if self.adaptive is not None:
+            self.repeat = max(self.repeat, 2)
+            self.max_repeat = self.adaptive.get("max", 10)
+            self.target_width = self.adaptive.get("target_width", 0.05)
+            self.confidence = self.adaptive.get("confidence", self.confidence)
+        self.repeated = self.repeat > 1
+
+    def done(self, runs):
+        if len(runs) < self.repeat:
+            return False
+        if self.adaptive is None or len(runs) >= self.max_repeat:
+            return True
+        for row in self.aggregate(runs):
+            for column in self.CONVERGENCE_COLUMNS:
+                summary = row["statistics"].get(column)
+                if summary is None or summary["mean"] == 0:
+                    continue
+                width = (summary["ci_high"] - summary["ci_low"]) / abs(summary["mean"])
+                if width > self.target_width:
+                    return False
+        return True
+
+    def aggregate(self, runs):
+        """Returns result rows with metrics replaced by their mean values
+        and statistics of all samples attached"""
+        rows = []
+        for i, row in enumerate(runs[0]):
+            row = dict(row)
+            row["statistics"] = {}
+            for column in row:
+                if not self.is_metric(column):
+                    continue
+                try:
+                    samples = [float(run[i][column]) for run in runs if i < len(run)]
+                except (KeyError, ValueError):
+                    continue
+                summary = summarize(samples, self.confidence)
+                row["statistics"][column] = summary
+                row[column] = f"{summary['mean']:.6f}"
+            # Percentiles of merged histograms are exact, unlike the mean of percentiles
+            histograms = [run[i].get("histogram") for run in runs if i < len(run)]
+            if all(histograms):
+                merged = Histogram.merged(histograms)
+                row["histogram"] = merged.to_dict()
+                for column, percentile in Histogram.percentile_columns(row):
+                    row[column] = f"{merged.percentile(percentile):.6f}"
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def is_metric(column):
+        return any(
+            unit in column
+            for unit in [
+                "ops/sec",
+                "items/sec",
+                "bytes/sec",
+                "micros/op",
+                "[MB/s]",
+                "[millis",
+            ]
+        )
+
+
+def summarize(samples, confidence=0.95):
+    """Returns statistics of samples with confidence interval of their mean"""
+    mean = statistics.mean(samples)
+    stddev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    half_width = 0.0
+    if len(samples) > 1:
+        quantile = student_t_quantile(1 - (1 - confidence) / 2, len(samples) - 1)
+        half_width = quantile * stddev / math.sqrt(len(samples))
+    return {
+        "samples": samples,
+        "mean": mean,
+        "stddev": stddev,
+        "median": statistics.median(samples),
+        "confidence": confidence,
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width,
+    }
+
+
+def student_t_quantile(p, df):
+    """Quantile of Student's t-distribution: exact for 1 and 2 degrees of freedom,
+    Cornish-Fisher expansion (accurate to ~1% at 3 degrees of freedom) above."""
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    return (
+        z
+        + (z ** 3 + z) / (4 * df)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+    )
 
 
 def print_results(results_dict):
     print(json.dumps(results_dict, indent=4, sort_keys=True))
 
 
-def save_results(results_dict, emon_output=None):
+def create_results_directory():
     basename = "pmemkv_bench_results"
-    suffix = datetime.datetime.now().strftime("%y%m%d_%H%M%S_%f")
-    dirname = "_".join([basename, suffix])
-    results_path = os.path.join(RESULTS_ROOT_DIRECTORY, dirname)
-    os.makedirs(results_path)
+    while True:
+        suffix = datetime.datetime.now().strftime("%y%m%d_%H%M%S_%f")
+        dirname = "_".join([basename, suffix])
+        results_path = os.path.join(RESULTS_ROOT_DIRECTORY, dirname)
+        try:
+            os.makedirs(results_path)
+            return results_path
+        except FileExistsError:
+            # test cases run in parallel may finish at the same time
+            continue
+
+
+def save_results(results_dict, results_path=None, store=None, attachments={}):
+    """Saves report in the results directory along with attachments
+    (files given by path and text content)"""
+    if results_path is None:
+        results_path = create_results_directory()
     output_file = os.path.join(results_path, "result.json")
     with open(output_file, "w") as outfile:
         json.dump(results_dict, outfile, indent=4, sort_keys=True)
 
-    if emon_output:
-        with open(os.path.join(results_path, "emon.dat"), "w") as emon_file:
-            emon_file.write(emon_output)
+    for path, content in attachments.items():
+        with open(os.path.join(results_path, path), "w") as attachment:
+            attachment.write(content)
+
+    (store or ResultsStore()).append(results_dict, results_path)
+    return results_path
+
+
+def load_results(results_path):
+    with open(os.path.join(results_path, "result.json"), "r") as infile:
+        return json.load(infile)
+
+
+class ResultsStore:
+    """Append-only store of reports. Each report is appended to the current segment as
+    a separate gzip member (holding a single JSON line), so it may be read without
+    decompressing the rest of the segment. Index (JSON lines) keeps location of each report
+    along with attributes used to select reports: engine, benchmarks, threads, value size,
+    commit and date. Only segments holding selected reports are read."""
+
+    SEGMENT_SIZE = 64 * 1024 ** 2
+    INDEX = "index.jsonl"
+    DATE_FORMAT = "%m/%d/%y %H:%M:%S"
+
+    def __init__(self, path=None):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.path = path or os.path.join(RESULTS_ROOT_DIRECTORY, "store")
+        self.index_path = os.path.join(self.path, self.INDEX)
+
+    @classmethod
+    def index_entry(cls, report):
+        test_case = report.get("runtime_parameters", {})
+        params = test_case.get("pmemkv_bench", {})
+        rows = report.get("results", [])
+        benchmarks = [row["Benchmark"] for row in rows if "Benchmark" in row]
+        if not benchmarks and "--benchmarks" in params:
+            benchmarks = params["--benchmarks"].split(",")
+        date = datetime.datetime.now()
+        if rows and "Date" in rows[0]:
+            try:
+                date = datetime.datetime.strptime(rows[0]["Date"], cls.DATE_FORMAT)
+            except ValueError:
+                pass
+        to_int = lambda value: int(value) if value is not None else None
+        return {
+            "engine": params.get("--engine"),
+            "benchmarks": benchmarks,
+            "threads": to_int(params.get("--threads")),
+            "value_size": to_int(params.get("--value_size")),
+            "commit": report.get("build_configuration", {})
+            .get("pmemkv", {})
+            .get("commit"),
+            "date": date.isoformat(),
+        }
+
+    def append(self, report, results_path=None):
+        """Appends report and returns its index entry"""
+        os.makedirs(self.path, exist_ok=True)
+        record = gzip.compress((json.dumps(report, sort_keys=True) + "\n").encode())
+        entry = self.index_entry(report)
+        entry["results_path"] = results_path
+        # Lock protects also against other processes using the same store
+        with open(os.path.join(self.path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            segment = self._current_segment()
+            with open(os.path.join(self.path, segment), "ab") as segment_file:
+                entry["segment"] = segment
+                entry["offset"] = segment_file.tell()
+                entry["length"] = len(record)
+                segment_file.write(record)
+            with open(self.index_path, "a") as index:
+                index.write(json.dumps(entry, sort_keys=True) + "\n")
+        return entry
+
+    @staticmethod
+    def _segment_number(segment):
+        return int(segment[len("segment-") : -len(".jsonl.gz")])
+
+    def _current_segment(self):
+        segments = sorted(
+            self._segment_number(name)
+            for name in os.listdir(self.path)
+            if re.fullmatch("segment-[0-9]+\\.jsonl\\.gz", name)
+        )
+        number = segments[-1] if segments else 0
+        segment = f"segment-{number}.jsonl.gz"
+        segment_path = os.path.join(self.path, segment)
+        if os.path.isfile(segment_path) and (
+            os.path.getsize(segment_path) >= self.SEGMENT_SIZE
+        ):
+            segment = f"segment-{number + 1}.jsonl.gz"
+        return segment
+
+    def index(self):
+        if not os.path.isfile(self.index_path):
+            return []
+        with open(self.index_path, "r") as index:
+            return [json.loads(line) for line in index if line.strip()]
+
+    @staticmethod
+    def matches(entry, date_from=None, date_to=None, **filters):
+        """Each filter is a value or list of allowed values of the index attribute.
+        Report of many benchmarks matches, if any of them is allowed."""
+        if date_from and entry["date"] < date_from:
+            return False
+        if date_to and entry["date"] > date_to:
+            return False
+        for name, allowed in filters.items():
+            if not isinstance(allowed, (list, tuple, set)):
+                allowed = [allowed]
+            value = entry.get(name)
+            values = value if isinstance(value, list) else [value]
+            if not any(v in allowed for v in values):
+                return False
+        return True
+
+    def query(self, **filters):
+        """Yields reports selected by filters (see matches()), e.g.
+        query(engine="cmap", threads=[1, 8], benchmarks="readrandom", date_from="2021-06")"""
+        selected = [entry for entry in self.index() if self.matches(entry, **filters)]
+        selected.sort(
+            key=lambda entry: (self._segment_number(entry["segment"]), entry["offset"])
+        )
+        segment, segment_file = None, None
+        try:
+            for entry in selected:
+                if segment != entry["segment"]:
+                    if segment_file:
+                        segment_file.close()
+                    segment = entry["segment"]
+                    segment_file = open(os.path.join(self.path, segment), "rb")
+                segment_file.seek(entry["offset"])
+                record = gzip.decompress(segment_file.read(entry["length"]))
+                yield json.loads(record)
+        finally:
+            if segment_file:
+                segment_file.close()
+
+    def import_directories(self, root):
+        """Appends reports saved in results directories (result.json files) under root"""
+        imported = set(entry["results_path"] for entry in self.index())
+        count = 0
+        for result_file in sorted(glob.glob(f"{root}/**/result.json", recursive=True)):
+            results_path = os.path.dirname(result_file)
+            if results_path in imported:
+                continue
+            self.append(load_results(results_path), results_path)
+            count += 1
+        self.logger.info(f"Imported {count} reports from {root}")
+        return count
 
 
 def load_scenarios(path, schema_path=None):
@@ -330,6 +1966,18 @@ Script may be parametrized by additional environment variables.""",
         help="""Path to json config file or python script, which provides generate() method.
 This parameter sets configuration of benchmarking process. Input structure is specified by bench_scenarios/bench.schema.json.
 Script may be parametrized by additional environment variables.""",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="SESSION",
+        help="""Name of the session to resume. Test cases already completed in that session are skipped.
+Name of the session is printed at the start of each run.""",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="""Run test cases, which are bound (by numactl) to different numa nodes and use different
+pmem devices, at the same time.""",
     )
     args = parser.parse_args()
     logger.info(f"{args.build_config_path=}")
@@ -348,49 +1996,64 @@ Script may be parametrized by additional environment variables.""",
     )
     logger.info(json.dumps(bench_params, indent=4))
 
-    libpmemobjcpp = CmakeProject(config["libpmemobjcpp"])
-    libpmemobjcpp.build()
-
-    pmemkv = CmakeProject(config["pmemkv"], dependencies=[libpmemobjcpp])
-    pmemkv.build()
-
-    benchmark = DB_bench(config["db_bench"], pmemkv)
-    benchmark.build()
+    cache = None
+    mirrors_path = None
+    if CACHE_ROOT_DIRECTORY:
+        cache = BuildCache(
+            os.path.join(CACHE_ROOT_DIRECTORY, "build"), BUILD_CACHE_SIZE_GB
+        )
+        mirrors_path = os.path.join(CACHE_ROOT_DIRECTORY, "git")
 
-    reports = []
-    for test_case in bench_params:
-        emon = Emon()
-        if test_case.get("emon") == "True":
-            logger.info("Starting emon...")
-            emon.start()
-        logger.info(f"Running: {test_case}")
-        benchmark.run(
-            test_case["env"], test_case["pmemkv_bench"], test_case.get("numactl")
+    snapshots = None
+    if CACHE_ROOT_DIRECTORY:
+        snapshots = PoolSnapshots(
+            BuildCache(os.path.join(CACHE_ROOT_DIRECTORY, "pools"), POOL_CACHE_SIZE_GB)
         )
-        if test_case.get("emon") == "True":
-            logger.info("Stopping emon...")
-            emon.stop()
-        if test_case.get("cleanup", 0) != 0:
-            logger.info("Doing cleanup...")
-            benchmark.cleanup(test_case["pmemkv_bench"])
-        benchmark_results = benchmark.get_results()
+    elif any(test_case.get("snapshot") for test_case in bench_params):
+        logger.warning("Pool snapshots require PMEMKV_BENCH_CACHE_DIR to be set")
 
-        report = {}
-        report["build_configuration"] = config
-        report["runtime_parameters"] = test_case
-        report["results"] = benchmark_results
-        reports.append(report)
+    def cmake_project(name):
+        def build(repo, *dependencies, jobs):
+            project = CmakeProject(config[name], list(dependencies), cache, repo)
+            project.build(jobs)
+            return project
 
-        logger.info("Run results:")
-        print_results(report)
+        return build
 
-        emon_data = None
-        if test_case.get("emon") == "True":
-            logger.info("Reading emon data...")
-            emon_data = emon.get_data()
+    def db_bench(repo, pmemkv):
+        benchmark = DB_bench(config["db_bench"], pmemkv, cache, repo)
+        benchmark.build()
+        return benchmark
 
-        save_results(report, emon_data)
+    # All clones are independent, builds wait only for their dependencies
+    graph = BuildGraph()
+    for name in ["libpmemobjcpp", "pmemkv", "db_bench"]:
+        graph.add(
+            f"clone {name}", lambda name=name: Repository(config[name], mirrors_path)
+        )
+    graph.add(
+        "libpmemobjcpp",
+        cmake_project("libpmemobjcpp"),
+        ["clone libpmemobjcpp"],
+        compilation=True,
+    )
+    graph.add(
+        "pmemkv",
+        cmake_project("pmemkv"),
+        ["clone pmemkv", "libpmemobjcpp"],
+        compilation=True,
+    )
+    graph.add("db_bench", db_bench, ["clone db_bench", "pmemkv"])
+    benchmark = graph.run()["db_bench"]
 
+    session = Session(args.resume)
+    scheduler = Scheduler(args.parallel)
+    reports = scheduler.run(
+        lambda test_case: run_test_case(
+            benchmark, config, test_case, session, snapshots
+        ),
+        bench_params,
+    )
     return reports
 
 
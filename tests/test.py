@@ -252,6 +252,9 @@ def test_benchmarks_separate_processes(bench1, cleanup1, bench2, expected):
         "generate_obj_based_scope.py",
         "generate_dram_scope.py",
         "generate_memkind_based_scope.py",
+        "generate_pool_open_scope.py",
+        "generate_ycsb_scope.py",
+        "generate_range_scope.py",
     ],
 )
 def test_scenario(scenario):
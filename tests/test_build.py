@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021, Intel Corporation
+
+import os, sys
+import shutil
+import subprocess
+import tempfile
+import pytest
+
+tests_path = os.path.dirname(os.path.realpath(__file__))
+project_path = os.path.dirname(tests_path)
+sys.path.append(project_path)
+import run_benchmark as rb
+
+
+def fill_entry(cache, key, size):
+    path = cache.prepare(key)
+    with open(os.path.join(path, "artifact"), "wb") as f:
+        f.write(b"x" * size)
+    cache.commit(key)
+
+
+def test_build_cache_key():
+    """Cache key has to be stable and sensitive for every component."""
+    key = rb.BuildCache.key("sha", ["-DA=1"], {"CC": "gcc"})
+    assert key == rb.BuildCache.key("sha", ["-DA=1"], {"CC": "gcc"})
+    assert key != rb.BuildCache.key("sha", ["-DA=1"], {"CC": "clang"})
+    assert key != rb.BuildCache.key("sha", ["-DA=0"], {"CC": "gcc"})
+
+
+def test_build_cache_restore():
+    """Only committed entries may be restored."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = rb.BuildCache(tmp, 1)
+        cache.prepare("a")
+        assert not cache.restore("a")
+        cache.commit("a")
+        assert cache.restore("a")
+
+
+def test_build_cache_lock():
+    """Entry is filled only once by concurrent sessions sharing the cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        builds = []
+
+        def build(cache):
+            with cache.lock("a"):
+                if cache.restore("a"):
+                    return
+                builds.append(cache)
+                fill_entry(cache, "a", 1)
+
+        sessions = [rb.BuildCache(tmp, 1) for _ in range(4)]
+        threads = [rb.threading.Thread(target=build, args=[s]) for s in sessions]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(builds) == 1
+
+
+def test_toolchain():
+    """Toolchain identity changes with the compiler."""
+    assert rb._toolchain("cc") == rb._toolchain("cc")
+    assert rb._toolchain("cc") != rb._toolchain("no-such-compiler")
+
+
+def test_build_cache_eviction():
+    """Least recently used entries are evicted, but entries used
+    in the current session are kept."""
+    with tempfile.TemporaryDirectory() as tmp:
+        old_session = rb.BuildCache(tmp, 1)
+        for key in ["a", "b", "c"]:
+            fill_entry(old_session, key, 1024)
+            os.utime(os.path.join(tmp, key, rb.BuildCache.COMPLETE_MARK), (1, 1))
+        # make "a" the most recently used one
+        old_session.restore("a")
+
+        cache = rb.BuildCache(tmp, 2048 / 1024 ** 3)
+        fill_entry(cache, "d", 1024)
+        assert sorted(os.listdir(tmp)) == ["a", "d"]
+
+
+def test_build_graph():
+    """Steps are executed after their dependencies and cpus are split
+    between compilations started at the same time."""
+    order = []
+
+    def step(name):
+        def action(*deps, **kwargs):
+            order.append(name)
+            return (name, deps, kwargs)
+
+        return action
+
+    graph = rb.BuildGraph(cpus=8)
+    graph.add("clone", step("clone"))
+    graph.add("a", step("a"), ["clone"], compilation=True)
+    graph.add("b", step("b"), ["clone"], compilation=True)
+    graph.add("c", step("c"), ["a", "b"], compilation=True)
+    results = graph.run()
+
+    assert order[0] == "clone"
+    assert order[-1] == "c"
+    assert results["c"][1] == (results["a"], results["b"])
+    # "a" and "b" become ready together, "c" is the only one running
+    assert "jobs" not in results["clone"][2]
+    assert results["a"][2]["jobs"] == 4
+    assert results["b"][2]["jobs"] == 4
+    assert results["c"][2]["jobs"] == 8
+
+
+def test_build_graph_cycle():
+    """Steps with unresolvable dependencies are reported."""
+    graph = rb.BuildGraph()
+    graph.add("a", lambda b: b, ["b"])
+    graph.add("b", lambda a: a, ["a"])
+    with pytest.raises(ValueError):
+        graph.run()
+
+
+def git(path, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@test"] + list(args),
+        cwd=path,
+        check=True,
+        capture_output=True,
+        universal_newlines=True,
+    ).stdout.rstrip()
+
+
+def test_repository_mirror():
+    """Repository is cloned through a local mirror, which is updated
+    incrementally and allows to work offline for mirrored commits."""
+    with tempfile.TemporaryDirectory() as tmp:
+        upstream = os.path.join(tmp, "upstream")
+        mirrors = os.path.join(tmp, "mirrors")
+        os.makedirs(upstream)
+        git(upstream, "init")
+        git(upstream, "commit", "--allow-empty", "-m", "first")
+
+        first = rb.Repository({"repo_url": upstream, "commit": "HEAD"}, mirrors)
+        git(upstream, "commit", "--allow-empty", "-m", "second")
+        config = {"repo_url": upstream, "commit": "HEAD"}
+        second = rb.Repository(config, mirrors)
+        assert git(second.path, "log", "-1", "--format=%s") == "second"
+        assert git(second.path, "remote", "get-url", "origin") == upstream
+        assert first.mirror == second.mirror
+
+        # upstream is not available anymore
+        shutil.rmtree(upstream)
+        offline = rb.Repository(
+            {"repo_url": upstream, "commit": config["commit"]}, mirrors
+        )
+        assert git(offline.path, "log", "-1", "--format=%s") == "second"
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021, Intel Corporation
+
+import os, sys
+import pytest
+import tempfile
+import threading
+
+tests_path = os.path.dirname(os.path.realpath(__file__))
+project_path = os.path.dirname(tests_path)
+sys.path.append(project_path)
+import run_benchmark as rb
+
+
+@pytest.fixture
+def results_dir(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch.setattr(rb, "RESULTS_ROOT_DIRECTORY", tmp)
+        yield tmp
+
+
+def test_session_resume(results_dir):
+    """Completed test cases are remembered by the resumed session."""
+    config = {"pmemkv": {"commit": "1234"}}
+    done_case = {"env": {}, "pmemkv_bench": {"--num": "100"}}
+    other_case = {"env": {}, "pmemkv_bench": {"--num": "200"}}
+    done_id = rb.Session.case_id(config, done_case)
+    other_id = rb.Session.case_id(config, other_case)
+    assert done_id != other_id
+
+    session = rb.Session()
+    results_path = rb.save_results({"runtime_parameters": done_case})
+    session.complete(done_id, results_path)
+
+    # Duplicates of a test case are not skipped in the same session
+    assert session.completed(done_id) is None
+
+    resumed = rb.Session(session.name)
+    assert resumed.completed(done_id) == results_path
+    assert resumed.completed(other_id) is None
+    assert rb.load_results(results_path)["runtime_parameters"] == done_case
+
+    with pytest.raises(ValueError):
+        rb.Session("unknown")
+
+
+def numa_case(node, db):
+    return {
+        "env": {},
+        "pmemkv_bench": {"--db": db},
+        "numactl": {"--cpubind": node},
+    }
+
+
+def test_scheduler_resources():
+    """Resources are derived from numactl binding and pool location."""
+    assert rb.Scheduler.resources(numa_case("0,1", "/dev/dax0.0")) == {
+        "node:0",
+        "node:1",
+        "device:/dev/dax0.0",
+    }
+    assert rb.Scheduler.resources({"env": {}, "pmemkv_bench": {}}) is None
+    emon_case = dict(numa_case("0", "/dev/dax0.0"), emon="True")
+    assert rb.Scheduler.resources(emon_case) is None
+
+
+def test_scheduler_parallel():
+    """Test cases on separate nodes and devices run at the same time,
+    conflicting ones keep their order."""
+    barrier = threading.Barrier(2, timeout=10)
+    order = []
+
+    def action(test_case):
+        if test_case["numactl"]["--cpubind"] in ["0", "1"]:
+            barrier.wait()
+        order.append(test_case["pmemkv_bench"]["--db"])
+        return test_case["pmemkv_bench"]["--db"]
+
+    test_cases = [
+        numa_case("0", "/dev/dax0.0"),
+        numa_case("1", "/dev/dax1.0"),
+        numa_case("0-1", "/dev/dax0.1"),
+    ]
+    results = rb.Scheduler(parallel=True).run(action, test_cases)
+    assert results == ["/dev/dax0.0", "/dev/dax1.0", "/dev/dax0.1"]
+    assert order[-1] == "/dev/dax0.1"
+
+
+def test_benchmark_process_watchdog():
+    """Process, which stops printing output, is killed, but results
+    printed before are kept and streamed to the output directory."""
+    script = (
+        "print('a,b', flush=True); print('1,2', flush=True); "
+        "print('a,c', flush=True); print('2,3', flush=True); time.sleep(60)"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        process = rb.BenchmarkProcess(
+            [sys.executable, "-c", f"import time; {script}"], tmp, {}, tmp
+        )
+        process.wait(timeout=30, progress_timeout=1)
+        assert process.killed
+        assert process.rows == [{"a": "1", "b": "2"}, {"a": "2", "c": "3"}]
+        with open(os.path.join(tmp, "pmemkv_bench.stdout"), "r") as stdout:
+            assert stdout.read() == "a,b\n1,2\na,c\n2,3\n"
+
+
+@pytest.mark.parametrize(
+    "df,expected", [(1, 12.706), (2, 4.303), (5, 2.571), (30, 2.042)]
+)
+def test_student_t_quantile(df, expected):
+    """Quantiles of t-distribution are close to tabular values."""
+    assert rb.student_t_quantile(0.975, df) == pytest.approx(expected, rel=0.01)
+
+
+def result_rows(ops, p999):
+    return [
+        {
+            "Benchmark": "fillseq",
+            "ops/sec": f"{ops}",
+            "Percentile P99.900000 [micros/op]": f"{p999}",
+        }
+    ]
+
+
+def test_repetition_adaptive():
+    """Adaptive repetition stops, when confidence interval is narrow enough."""
+    repetition = rb.Repetition({"repeat_adaptive": {"max": 5, "target_width": 0.1}})
+    stable = [result_rows(1000, 10), result_rows(1001, 10)]
+    assert repetition.done(stable)
+    noisy = [result_rows(1000, 10), result_rows(2000, 10)]
+    assert not repetition.done(noisy)
+    assert repetition.done(noisy * 3)
+
+    row = repetition.aggregate(stable)[0]
+    assert row["Benchmark"] == "fillseq"
+    assert float(row["ops/sec"]) == pytest.approx(1000.5)
+    assert row["statistics"]["ops/sec"]["samples"] == [1000.0, 1001.0]
+    assert "Benchmark" not in row["statistics"]
+
+
+class FillingBenchmark:
+    """Writes the pool instead of running pmemkv_bench"""
+
+    artifact_key = "bench"
+
+    def __init__(self, path=None):
+        self.path = path
+        self.runs = []
+
+    def run(self, environ, benchmark_params, numactl_params=None, **kwargs):
+        self.runs.append(benchmark_params["--benchmarks"])
+        with open(benchmark_params["--db"], "w") as pool:
+            pool.write(benchmark_params["--num"])
+        process = rb.BenchmarkProcess(["true"], None, None)
+        process.wait()
+        return process
+
+
+def test_pool_snapshots():
+    """Pool is filled once and restored by test cases with the same fill phase."""
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshots = rb.PoolSnapshots(rb.BuildCache(os.path.join(tmp, "pools"), 1))
+        benchmark = FillingBenchmark()
+        db = os.path.join(tmp, "pool")
+        params = {"--benchmarks": "fillseq,readrandom", "--num": "100", "--db": db}
+        case = {"env": {}, "pmemkv_bench": params}
+
+        assert snapshots.prepare(benchmark, case)["--benchmarks"] == "readrandom"
+        assert benchmark.runs == ["fillseq"]
+        os.remove(db)
+        other_case = dict(
+            case, pmemkv_bench=dict(params, **{"--benchmarks": "fillseq,readseq"})
+        )
+        assert snapshots.prepare(benchmark, other_case)["--benchmarks"] == "readseq"
+        assert benchmark.runs == ["fillseq"]
+        with open(db) as pool:
+            assert pool.read() == "100"
+
+        reported_case = dict(
+            case, pmemkv_bench=dict(params, **{"--histogram": "1", "--per_thread": "1"})
+        )
+        snapshots.prepare(benchmark, reported_case)
+        assert benchmark.runs == ["fillseq"]
+
+        bigger_case = dict(case, pmemkv_bench=dict(params, **{"--num": "200"}))
+        snapshots.prepare(benchmark, bigger_case)
+        assert benchmark.runs == ["fillseq", "fillseq"]
+
+        zipfian_case = dict(
+            case, pmemkv_bench=dict(params, **{"--key_distribution": "zipfian"})
+        )
+        snapshots.prepare(benchmark, zipfian_case)
+        assert benchmark.runs == ["fillseq"] * 3
+
+        # histogram file given relatively to the benchmark directory
+        benchmark.path = tmp
+        with open(os.path.join(tmp, "sizes"), "w") as sizes:
+            sizes.write("8 1\n")
+        sized_case = dict(
+            case,
+            pmemkv_bench=dict(params, **{"--value_size_distribution": "file:sizes"}),
+        )
+        snapshots.prepare(benchmark, sized_case)
+        snapshots.prepare(benchmark, sized_case)
+        assert benchmark.runs == ["fillseq"] * 4
+        with open(os.path.join(tmp, "sizes"), "w") as sizes:
+            sizes.write("16 1\n")
+        snapshots.prepare(benchmark, sized_case)
+        assert benchmark.runs == ["fillseq"] * 5
+
+        timed_case = dict(case, pmemkv_bench=dict(params, **{"--duration": "10"}))
+        assert snapshots.prepare(benchmark, timed_case) == timed_case["pmemkv_bench"]
+        assert benchmark.runs == ["fillseq"] * 5
+
+        measured_fill = dict(
+            case, pmemkv_bench=dict(params, **{"--benchmarks": "fillseq"})
+        )
+        assert (
+            snapshots.prepare(benchmark, measured_fill) == measured_fill["pmemkv_bench"]
+        )
+
+
+def store_report(engine, threads, benchmarks):
+    return {
+        "build_configuration": {"pmemkv": {"commit": "1234"}},
+        "runtime_parameters": {
+            "env": {},
+            "pmemkv_bench": {
+                "--engine": engine,
+                "--threads": str(threads),
+                "--value_size": "8",
+                "--benchmarks": benchmarks,
+            },
+        },
+        "results": [
+            {"Benchmark": name, "Date": "06/15/21 10:00:00"}
+            for name in benchmarks.split(",")
+        ],
+    }
+
+
+def test_results_store(results_dir, monkeypatch):
+    """Reports are selected by indexed attributes, reading only their segments."""
+    store = rb.ResultsStore()
+    monkeypatch.setattr(rb.ResultsStore, "SEGMENT_SIZE", 1)
+    cmap = store_report("cmap", 8, "fillseq,readrandom")
+    csmap = store_report("csmap", 1, "fillrandom,readseq")
+    rb.save_results(cmap, store=store)
+    rb.save_results(csmap, store=store)
+    assert [e["segment"] for e in store.index()] == [
+        "segment-0.jsonl.gz",
+        "segment-1.jsonl.gz",
+    ]
+
+    assert list(store.query(engine="cmap")) == [cmap]
+    assert list(store.query(benchmarks="readseq", threads=[1, 4])) == [csmap]
+    assert list(store.query(date_from="2021-06-01", commit="1234")) == [cmap, csmap]
+    assert list(store.query(date_from="2021-07-01")) == []
+
+    os.remove(os.path.join(store.path, "segment-0.jsonl.gz"))
+    assert list(store.query(engine="csmap")) == [csmap]
+
+    imported = rb.ResultsStore(os.path.join(results_dir, "imported"))
+    assert imported.import_directories(results_dir) == 2
+    assert imported.import_directories(results_dir) == 0
+    assert len(list(imported.query(value_size=8))) == 2
+
+    # segments are read in the order of appending, not of their names
+    reports = [store_report("stree", size, "fillseq") for size in range(10)]
+    for report in reports:
+        rb.save_results(report, store=store)
+    assert store.index()[-1]["segment"] == "segment-11.jsonl.gz"
+    assert list(store.query(engine="stree")) == reports
+
+
+PERF_STAT_OUTPUT = """# started on Thu Jun 17 10:00:00 2021
+
+2000,,cycles,1000,100.00,,
+3000,,instructions,1000,100.00,1.50,insn per cycle
+<not supported>,,dTLB-load-misses,0,100.00,,
+"""
+
+
+def test_perf_stat_parse():
+    assert rb.PerfStat().parse(PERF_STAT_OUTPUT) == {
+        "cycles": 2000,
+        "instructions": 3000,
+        "dTLB-load-misses": None,
+        "IPC": 1.5,
+    }
+
+
+EMON_OUTPUT = """\
+Version Info: public V11.28 Intel(R) Processor code named Cascadelake
+TSC Freq ............... 1000.00 MHz
+----------
+INST_RETIRED.ANY\t1,000,000,000\t3,000,000\t1,000,000
+CPU_CLK_UNHALTED.THREAD\t1,000,000,000\t2,000,000\t2,000,000
+UNC_M_CAS_COUNT.RD\t1,000,000,000\t1,000,000\t1,000,000
+----------
+UNC_M_CAS_COUNT.WR\t500,000,000\t500,000\tN/A
+==========
+----------
+INST_RETIRED.ANY\t2,000,000,000\t2,000,000\t0
+CPU_CLK_UNHALTED.THREAD\t2,000,000,000\t4,000,000\t0
+UNC_M_CAS_COUNT.RD\t2,000,000,000\t0\t0
+==========
+"""
+
+
+def test_emon_parse():
+    metrics = rb.Emon().parse(EMON_OUTPUT)
+    first, second = metrics.pop("intervals")
+    assert first["IPC"] == 1
+    assert first["memory read bandwidth [MB/s]"] == pytest.approx(128)
+    # write counts are incomplete, so the line is skipped
+    assert "memory write bandwidth [MB/s]" not in first
+    assert "LLC miss rate" not in first
+    assert second["IPC"] == 0.5
+    assert second["memory read bandwidth [MB/s]"] == 0
+    assert metrics["duration [s]"] == 3
+    assert metrics["IPC"] == 0.75
+    assert metrics["memory read bandwidth [MB/s]"] == pytest.approx(128 / 3)
+    assert rb.Emon().parse("Version Info: public V11.28") is None
+
+
+class CountingCollector(rb.Collector):
+    NAME = "counting"
+    PER_PROCESS = True
+    ATTACHMENT = "counting.txt"
+
+    def start(self, pid=None):
+        self.pid = pid
+
+    def stop(self, timeout=None):
+        pass
+
+    def get_data(self):
+        return str(self.pid)
+
+    def parse(self, data):
+        return {"attached": int(data) > 0}
+
+
+class EchoBenchmark:
+    """Fake of DB_bench, which prints fixed results instead of running pmemkv_bench.
+    Results are read by methods of DB_bench."""
+
+    INTERVALS_FILE = rb.DB_bench.INTERVALS_FILE
+    HISTOGRAMS_FILE = rb.DB_bench.HISTOGRAMS_FILE
+    get_results = rb.DB_bench.get_results
+    get_histograms = rb.DB_bench.get_histograms
+    get_intervals = rb.DB_bench.get_intervals
+
+    def cleanup(self, benchmark_params):
+        pass
+
+    def run(self, environ, benchmark_params, output_dir=None, collectors=[], **kwargs):
+        if "--report_interval_ms" in benchmark_params:
+            with open(os.path.join(output_dir, self.INTERVALS_FILE), "w") as intervals:
+                intervals.write("Benchmark,ops/sec\nreadrandom,90\nreadrandom,110\n")
+        process = rb.BenchmarkProcess(
+            ["printf", "Benchmark,ops/sec\\nreadrandom,100\\n"], None, None, output_dir
+        )
+        for collector in collectors:
+            collector.start(process.pid)
+        process.wait()
+        return process
+
+
+def test_collectors(results_dir, monkeypatch):
+    """Collectors selected by test case store parsed counters in the report."""
+    monkeypatch.setitem(rb.COLLECTORS, "counting", CountingCollector)
+    case = {"env": {}, "pmemkv_bench": {}, "collectors": ["counting"], "repeat": 2}
+    assert rb.collector_specs(case) == [(CountingCollector, {})]
+    with pytest.raises(ValueError):
+        rb.collector_specs({"collectors": [{"name": "unknown"}]})
+    emon_case = {"emon": "True", "collectors": [{"name": "perf_stat", "events": []}]}
+    assert rb.collector_specs(emon_case) == [
+        (rb.Emon, {}),
+        (rb.PerfStat, {"events": []}),
+    ]
+
+    report = rb.run_test_case(EchoBenchmark(), {}, case, rb.Session())
+    assert report["counters"] == {"counting": [{"attached": True}] * 2}
+    results_path = rb.ResultsStore().index()[0]["results_path"]
+    for run in ["repetition_0", "repetition_1"]:
+        assert os.path.isfile(os.path.join(results_path, run, "counting.txt"))
+
+
+def test_proc_sampler():
+    """Resource usage of the process is sampled until it finishes."""
+    process = rb.BenchmarkProcess(
+        ["python3", "-c", "import time; x = bytearray(64 << 20); time.sleep(0.5)"],
+        None,
+        None,
+    )
+    sampler = rb.ProcSampler(interval=0.05)
+    sampler.start(process.pid)
+    process.wait()
+    sampler.stop()
+
+    summary = sampler.parse(sampler.get_data())
+    assert summary["samples"] > 2
+    assert summary["peak RSS [kB]"] > 64 * 1024
+    assert summary["minor faults"] >= 0
+    assert 0 <= summary["cpu utilization [%]"] <= 100 * os.cpu_count()
+
+
+def test_intervals(results_dir):
+    """Interval reports are collected into the report."""
+    case = {"env": {}, "pmemkv_bench": {"--report_interval_ms": "100"}}
+    report = rb.run_test_case(EchoBenchmark(), {}, case, rb.Session())
+    assert [row["ops/sec"] for row in report["intervals"]] == ["90", "110"]
+    report = rb.run_test_case(
+        EchoBenchmark(), {}, dict(case, pmemkv_bench={}), rb.Session()
+    )
+    assert "intervals" not in report
+
+
+def histogram(latencies):
+    buckets = {}
+    for latency in latencies:
+        buckets[(latency, latency + 1)] = buckets.get((latency, latency + 1), 0) + 1
+    return {
+        "min": min(latencies),
+        "max": max(latencies),
+        "num": len(latencies),
+        "sum": sum(latencies),
+        "sum_squares": sum(latency ** 2 for latency in latencies),
+        "buckets": [[l, r, count] for (l, r), count in sorted(buckets.items())],
+    }
+
+
+def test_histogram_merge():
+    """Percentiles of merged histograms are computed from all samples."""
+    fast = histogram([1] * 99 + [2])
+    slow = histogram([1] * 90 + [50] * 10)
+    merged = rb.Histogram.merged([fast, slow])
+    assert merged.num == 200
+    assert merged.to_dict() == histogram([1] * 189 + [2] + [50] * 10)
+    assert merged.percentile(50) == pytest.approx(1.5291, abs=1e-4)
+    assert merged.percentile(99) == 50
+    assert rb.Histogram(fast).percentile(99.5) == 2
+
+    runs = [
+        [
+            {
+                "sequence_id": "1",
+                "Percentile P99.000000 [micros/op]": "1.99",
+                "histogram": fast,
+            }
+        ],
+        [
+            {
+                "sequence_id": "1",
+                "Percentile P99.000000 [micros/op]": "50.9",
+                "histogram": slow,
+            }
+        ],
+    ]
+    row = rb.Repetition({"repeat": 2}).aggregate(runs)[0]
+    assert row["Percentile P99.000000 [micros/op]"] == "50.000000"
+    assert row["statistics"]["Percentile P99.000000 [micros/op]"]["mean"] == 26.445
+
+
+PERF_SCRIPT_OUTPUT = """\
+pmemkv_bench 1234 100.000001:   10101010 cycles:u:
+\t    7f0000000010 pmem::kv::internal::cmap::get+0x20 (/usr/lib/libpmemkv.so.1)
+\t    400010 Benchmark::DoRead+0x1c (/bench/pmemkv_bench)
+\t    400000 main+0x10 (/bench/pmemkv_bench)
+
+pmemkv_bench 1234 100.010001:   10101010 cycles:u:
+\t    7f0000000020 [unknown] (/usr/lib/libc.so.6)
+\t    400010 Benchmark::DoRead+0x1c (/bench/pmemkv_bench)
+\t    400000 main+0x10 (/bench/pmemkv_bench)
+
+pmemkv_bench 1234 100.020001:   10101010 cycles:u:
+\t    7f0000000010 pmem::kv::internal::cmap::get+0x24 (/usr/lib/libpmemkv.so.1)
+\t    400010 Benchmark::DoRead+0x1c (/bench/pmemkv_bench)
+\t    400000 main+0x10 (/bench/pmemkv_bench)
+"""
+
+
+def test_profile_processing():
+    folded = rb.Profiler.fold(PERF_SCRIPT_OUTPUT)
+    assert folded == {
+        "pmemkv_bench;main;Benchmark::DoRead;pmem::kv::internal::cmap::get": 2,
+        "pmemkv_bench;main;Benchmark::DoRead;[libc.so.6]": 1,
+    }
+    top = rb.Profiler.top_functions(folded, top=2)
+    assert [row["function"] for row in top] == [
+        "pmem::kv::internal::cmap::get",
+        "[libc.so.6]",
+    ]
+    assert top[0]["self [%]"] == pytest.approx(200 / 3)
+    assert top[0]["total"] == 2
+
+    cmd = rb.CmdLine()
+    rb.Profiler.from_test_case({"profile": {"frequency": 999}}).wrap(cmd, "out")
+    assert str(cmd).startswith("perf record --freq=999 --call-graph=fp")
+    assert cmd[-1] == "--"
+    assert rb.Profiler.from_test_case({}) is None
+
+
+def test_profile_processing_failure(monkeypatch):
+    """Profile, which cannot be processed, is skipped with a warning."""
+    monkeypatch.setenv("PATH", "")
+    with tempfile.TemporaryDirectory() as tmp:
+        open(os.path.join(tmp, rb.Profiler.DATA_FILE), "w").close()
+        assert rb.Profiler().process(tmp) == (None, {})
+        assert os.path.isfile(os.path.join(tmp, rb.Profiler.DATA_FILE))
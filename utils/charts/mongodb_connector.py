@@ -5,6 +5,14 @@
 
 from collections import defaultdict
 from pymongo import MongoClient
+import os
+import sys
+
+project_path = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+)
+sys.path.append(project_path)
+from utils.histogram import Histogram
 
 # Shorten most used fields' names to ease grouping step
 # and convert strings to actual data types.
@@ -39,6 +47,9 @@ DEFAULT_AGGR_ADD_FIELDS = {
                 "onError": "null",
             }
         },
+        "key_distribution": {
+            "$ifNull": ["$runtime_parameters.params.--key_distribution", "uniform"]
+        },
         "throughput": {
             "$convert": {
                 "input": "$results.throughput [MB/s]",
@@ -49,6 +60,14 @@ DEFAULT_AGGR_ADD_FIELDS = {
         "ops/sec": {
             "$convert": {"input": "$results.ops/sec", "to": "double", "onError": "null"}
         },
+        # Available only for range benchmarks (e.g. scanrandom)
+        "items/sec": {
+            "$convert": {
+                "input": "$results.items/sec",
+                "to": "double",
+                "onError": "null",
+            }
+        },
         "P999": {
             "$convert": {
                 "input": "$results.Percentile P99_900000 [micros/op]",
@@ -66,14 +85,43 @@ DEFAULT_AGGR_ADD_FIELDS = {
         "Date": {
             "$convert": {"input": "$results.Date", "to": "date", "onError": "null"}
         },
+        # Statistics are available only for repeated test cases
+        "ops/sec stddev": "$results.statistics.ops/sec.stddev",
+        "ops/sec ci_low": "$results.statistics.ops/sec.ci_low",
+        "ops/sec ci_high": "$results.statistics.ops/sec.ci_high",
+        "P999 stddev": "$results.statistics.Percentile P99_900000 [micros/op].stddev",
+        "P9999 stddev": "$results.statistics.Percentile P99_990000 [micros/op].stddev",
+        "repetitions": {"$size": {"$ifNull": ["$samples", [[]]]}},
+        # Full histogram is available only if test case enabled 'histograms'
+        "histogram": {"$ifNull": ["$results.histogram", None]},
+        # Platform metrics are available only if emon was run along with the benchmark
+        **{
+            field: {
+                "$convert": {
+                    "input": f"$counters.emon.{metric}",
+                    "to": "double",
+                    "onError": "null",
+                }
+            }
+            for field, metric in {
+                "mem_read_bw": "memory read bandwidth [MB/s]",
+                "mem_write_bw": "memory write bandwidth [MB/s]",
+                "pmem_read_bw": "pmem read bandwidth [MB/s]",
+                "pmem_write_bw": "pmem write bandwidth [MB/s]",
+                "llc_miss_rate": "LLC miss rate",
+            }.items()
+        },
     }
 }
+# Percentiles, which may be computed from merged histograms
+HISTOGRAM_PERCENTILES = {"P999": 99.9, "P9999": 99.99}
 # Project grouped data into x, y and color (to simplify usage on plots)
 DEFAULT_AGGR_PROJECT = {
     "$project": {
         "y": "$__alias_0",
         "x": "$_id.__alias_1",
         "color": "$_id.__alias_2",
+        "error": "$__alias_3",
         "_id": 0,
     }
 }
@@ -169,6 +217,12 @@ class MongodbConnector:
             print(f"Aggregation param {e} is required")
             exit(1)
 
+        # Percentile of grouped results may be computed from their merged histograms,
+        # instead of averaging percentiles of each result
+        merged_percentile = None
+        if aggregation_params.get("merge_histograms"):
+            merged_percentile = HISTOGRAM_PERCENTILES.get(group_by_aggr)
+
         emon_enabled = aggregation_params.get("emon_enabled", None)
         nums = aggregation_params.get("nums", None)
         threads = aggregation_params.get("threads", None)
@@ -202,8 +256,20 @@ class MongodbConnector:
             }
         }
         # optional filters
-        if emon_enabled is not None:
-            emon = ["1", 1, "True"] if emon_enabled else ["0", 0, "False"]
+        if emon_enabled:
+            # emon may be enabled by legacy option or selected as a collector
+            match_pipeline["$match"].update(
+                {
+                    "$or": [
+                        {"runtime_parameters.emon": {"$in": ["1", 1, "True"]}},
+                        {"runtime_parameters.collectors": "emon"},
+                        # upload_to_mongo renames "name" keys to "metric"
+                        {"runtime_parameters.collectors.metric": "emon"},
+                    ]
+                }
+            )
+        elif emon_enabled is not None:
+            emon = ["0", 0, "False"]
             match_pipeline["$match"].update({"runtime_parameters.emon": {"$in": emon}})
         if nums is not None:
             match_pipeline["$match"].update({"num": {"$in": nums}})
@@ -230,17 +296,47 @@ class MongodbConnector:
             "$group": {
                 "_id": {"__alias_1": group_by_1, "__alias_2": group_by_2},
                 "__alias_0": {"$avg": group_by_aggr},
+                # null, if there are no statistics for aggregated field
+                "__alias_3": {"$avg": group_by_aggr + " stddev"},
             }
         }
+        project_pipeline = DEFAULT_AGGR_PROJECT
+        if merged_percentile is not None:
+            grouping_pipeline["$group"]["__histograms"] = {"$push": "$histogram"}
+            project_pipeline = {
+                "$project": dict(
+                    DEFAULT_AGGR_PROJECT["$project"], histograms="$__histograms"
+                )
+            }
         pipeline.append(grouping_pipeline)
 
         ### Project and sort results ###
-        pipeline.append(DEFAULT_AGGR_PROJECT)
+        pipeline.append(project_pipeline)
         pipeline.append(DEFAULT_AGGR_SORT)
 
         results = MongodbConnector.get_aggregate_objects(db_config, pipeline)
+        if merged_percentile is not None:
+            MongodbConnector.merge_percentiles(results, merged_percentile)
         return results, pipeline
 
+    @staticmethod
+    def merge_percentiles(results, percentile):
+        """
+        Replace averaged percentile ('y') with the percentile of merged histograms,
+        if all grouped results have their histograms.
+        @param results: documents, returned from MongoDB (with 'histograms' field)
+        @type results: list
+        @param percentile: percentile to compute, e.g. 99.9
+        @type percentile: float
+        @return: results, updated in place
+        @rtype: list
+        """
+        for obj in results:
+            histograms = obj.pop("histograms", [])
+            if histograms and all(histograms):
+                obj["y"] = Histogram.merged(histograms).percentile(percentile)
+        return results
+
     @staticmethod
     def get_aggregate_objects(db_config, pipeline):
         """
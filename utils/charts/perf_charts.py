@@ -377,6 +377,8 @@ class Charts:
             "group_by_1": "threads",
             "group_by_2": "engine",
             "group_by_aggr": "P999",
+            # exact percentiles from merged histograms, where reports have them
+            "merge_histograms": True,
             "emon_enabled": False,
             "nums": [10000000],
         }
@@ -400,6 +402,8 @@ class Charts:
             "group_by_1": "threads",
             "group_by_2": "engine",
             "group_by_aggr": "P999",
+            # exact percentiles from merged histograms, where reports have them
+            "merge_histograms": True,
             "emon_enabled": False,
             "nums": [10000000],
         }
@@ -414,6 +418,65 @@ class Charts:
 
             generate_chart(3)
 
+        #### standard MT benchmarks - memory bandwidth (emon) ####
+        aggregation_params = {
+            "engines": ["csmap", "cmap"],
+            "value_sizes": [8],
+            "key_sizes": [8],
+            "date_from": date_from,
+            "group_by_1": "threads",
+            "group_by_2": "engine",
+            "emon_enabled": True,
+            "nums": [10000000],
+        }
+        for bench in ["fillrandom", "fillseq", "readrandom", "readseq"]:
+            for metric, metric_title in [
+                ("mem_read_bw", "Memory read bandwidth [MB/s]"),
+                ("mem_write_bw", "Memory write bandwidth [MB/s]"),
+                ("pmem_read_bw", "Pmem read bandwidth [MB/s]"),
+                ("pmem_write_bw", "Pmem write bandwidth [MB/s]"),
+            ]:
+                aggregation_params["benchmark"] = [bench]
+                aggregation_params["group_by_aggr"] = metric
+                y_axis = metric_title
+                x_axis = "Threads"
+                legend = "Engines"
+                nums_str = "10Mil"
+                chart_title = f"{metric_title} 8B k&v {bench} MT engines"
+                file_path = f"{OUT_DIR}/emon_{metric}_8_{nums_str}-{bench}"
+
+                generate_chart(2)
+
+        #### range benchmarks - sorted engines ####
+        aggregation_params = {
+            "engines": ["csmap", "radix", "stree"],
+            "threads": [1],
+            "value_sizes": [8, 128, 256, 512, 1024],
+            "key_sizes": [8],
+            "date_from": date_from,
+            "group_by_1": "value_size",
+            "group_by_2": "engine",
+            "emon_enabled": False,
+            "nums": [10000000],
+        }
+        for bench in ["seekrandom", "scanrandom", "countrange"]:
+            for aggr, aggr_title in [
+                ("ops/sec", "ops/sec"),
+                ("items/sec", "items/sec"),
+            ]:
+                aggregation_params["benchmark"] = [bench]
+                aggregation_params["group_by_aggr"] = aggr
+                y_axis = aggr_title + HIGHER_BETTER
+                x_axis = "Value sizes"
+                legend = "Engines"
+                nums_str = "10Mil"
+                chart_title = f"{aggr_title} 8B keys {bench} Single Thread"
+                file_path = (
+                    f"{OUT_DIR}/range_{aggr.replace('/', '_')}_8_{nums_str}-{bench}"
+                )
+
+                generate_chart(3)
+
         #### single engine with various value_sizes ####
         aggregation_params = {
             "value_sizes": [8, 128, 256, 512, 1024],
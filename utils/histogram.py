@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021, Intel Corporation
+
+import math
+import re
+
+
+class Histogram:
+    """Latency histogram of pmemkv_bench (leveldb's Histogram), as written to --histogram_file.
+    Histograms (e.g. of repeated runs) are merged exactly, by adding counts of their buckets.
+    Percentiles are interpolated within a bucket, the same way as in pmemkv_bench."""
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.min = data.get("min", math.inf)
+        self.max = data.get("max", 0.0)
+        self.num = data.get("num", 0.0)
+        self.sum = data.get("sum", 0.0)
+        self.sum_squares = data.get("sum_squares", 0.0)
+        self.buckets = {}
+        for left, right, count in data.get("buckets", []):
+            self.buckets[(left, right)] = count
+
+    @classmethod
+    def merged(cls, histograms):
+        result = cls()
+        for histogram in histograms:
+            result.merge(histogram if isinstance(histogram, cls) else cls(histogram))
+        return result
+
+    def merge(self, other):
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.num += other.num
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    def percentile(self, p):
+        threshold = self.num * (p / 100.0)
+        total = 0
+        for (left, right), count in sorted(self.buckets.items()):
+            total += count
+            if total >= threshold:
+                # Scale linearly within this bucket
+                position = (threshold - (total - count)) / count
+                value = left + (right - left) * position
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def average(self):
+        return self.sum / self.num if self.num else 0.0
+
+    def to_dict(self):
+        return {
+            "min": self.min,
+            "max": self.max,
+            "num": self.num,
+            "sum": self.sum,
+            "sum_squares": self.sum_squares,
+            "buckets": [
+                [left, right, count]
+                for (left, right), count in sorted(self.buckets.items())
+            ],
+        }
+
+    @staticmethod
+    def percentile_columns(row):
+        """Yields columns of the result row holding percentiles, along with their values"""
+        for column in row:
+            if column == "Median [micros/op]":
+                yield column, 50.0
+            match = re.fullmatch("Percentile P([0-9.]+) \\[micros/op\\]", column)
+            if match:
+                yield column, float(match.group(1))
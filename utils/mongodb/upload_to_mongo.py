@@ -14,8 +14,18 @@ logger = logging.getLogger(__name__)
 
 
 def csv_load(file_handler):
-    OutputReader = csv.DictReader(file_handler.read().split("\n"), delimiter=",")
-    return [x for x in OutputReader]
+    """Loads rows of CSV, in which each row may be preceded by its own header
+    (starting with the same column, as in pmemkv_bench output)"""
+    rows = []
+    header = None
+    for fields in csv.reader(file_handler.read().splitlines(), delimiter=","):
+        if not fields:
+            continue
+        if header is None or fields[0] == header[0]:
+            header = fields
+            continue
+        rows.append(dict(zip(header, fields)))
+    return rows
 
 
 def preprocess(d):
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+#
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021, Intel Corporation
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+project_path = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+)
+sys.path.append(project_path)
+from run_benchmark import ResultsStore, RESULTS_ROOT_DIRECTORY
+
+
+if __name__ == "__main__":
+    help_msg = """
+Imports results directories into the results store or prints reports selected from the store
+(as JSON lines). Store is located in 'store' subdirectory of PMEMKV_BENCH_RESULTS_DIR
+('results' by default), unless --store is given.
+
+example:
+    results_store.py import results
+    results_store.py query --engine cmap --threads 1 8 --date_from 2021-06-01
+"""
+    logging.basicConfig(level=os.environ.get("LOGLEVEL") or "INFO")
+    parser = argparse.ArgumentParser(
+        description=help_msg, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--store", help="Path to the results store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import")
+    import_parser.add_argument(
+        "root", nargs="?", default=RESULTS_ROOT_DIRECTORY, help="Results directory"
+    )
+    query_parser = subparsers.add_parser("query")
+    query_parser.add_argument("--engine", nargs="+")
+    query_parser.add_argument("--benchmarks", nargs="+")
+    query_parser.add_argument("--threads", nargs="+", type=int)
+    query_parser.add_argument("--value_size", nargs="+", type=int)
+    query_parser.add_argument("--commit", nargs="+")
+    query_parser.add_argument("--date_from", help="ISO date, e.g. 2021-06-01")
+    query_parser.add_argument("--date_to", help="ISO date, e.g. 2021-06-30")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    if args.command == "import":
+        store.import_directories(args.root)
+    else:
+        filters = {
+            name: value
+            for name, value in vars(args).items()
+            if name not in ["store", "command"] and value is not None
+        }
+        for report in store.query(**filters):
+            print(json.dumps(report, sort_keys=True))